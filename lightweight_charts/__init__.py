@@ -1,5 +1,48 @@
-from .abstract import AbstractChart, Window
-from .chart import Chart
-from .widgets import JupyterChart
-from .polygon import PolygonChart
-from .helpers import chart, Panel, PlotSRAccessor, PlotDFAccessor
\ No newline at end of file
+import importlib
+import sys
+from types import ModuleType
+
+# Submodules are imported on first access, so that importing the package
+# doesn't pull in pandas, pywebview or the GUI frameworks until they are used.
+_exports = {
+    'AbstractChart': 'abstract',
+    'Window': 'abstract',
+    'Chart': 'chart',
+    'JupyterChart': 'widgets',
+    'PolygonChart': 'polygon',
+    'chart': 'helpers',
+    'Panel': 'helpers',
+    'PlotSRAccessor': 'helpers',
+    'PlotDFAccessor': 'helpers',
+}
+
+__all__ = list(_exports)
+
+
+def __getattr__(name):
+    if name not in _exports:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    module = importlib.import_module(f'.{_exports[name]}', __name__)
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *_exports})
+
+
+class _Package(ModuleType):
+    def __setattr__(self, name, value):
+        # the import system binds each submodule onto the package; `chart` is the helper, not the submodule
+        if name == 'chart' and isinstance(value, ModuleType):
+            return
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
+
+
+# the `lw` pandas accessors are registered by helpers; when pandas is already in use this is cheap
+if 'pandas' in sys.modules:
+    from .helpers import chart, Panel, PlotSRAccessor, PlotDFAccessor
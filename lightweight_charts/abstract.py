@@ -1,20 +1,26 @@
 import asyncio
+import concurrent.futures
 import json
+import orjson
 import os
+import time
 from base64 import b64decode
 from datetime import datetime
 from typing import Callable, Union, Literal, List, Optional
+import numpy as np
 import pandas as pd
 import random
+import threading
 #from vectorbtpro.indicators import IndicatorFactory 
 from .table import Table
 from .toolbox import ToolBox
 from .drawings import Box, HorizontalLine, RayLine, TrendLine, TwoPointDrawing, VerticalLine, VerticalSpan
 from .topbar import TopBar
 from .util import (
-    BulkRunScript, Pane, Events, IDGen, as_enum, jbool, js_json, TIME, NUM, FLOAT,
+    BarStore, MarkerStore, BulkRunScript, DataProvider, Profiler, ResultRouter, ScriptBatcher, UpdateCoalescer, Pane, Events, IDGen, as_enum, jbool, js_json, camel_options, TIME, NUM, FLOAT,
     LINE_STYLE, MARKER_POSITION, MARKER_SHAPE, CROSSHAIR_MODE, MARKER_TYPE,
-    PRICE_SCALE_MODE, marker_position, marker_shape, js_data, is_vbt_indicator, apply_opacity, get_next_color
+    PRICE_SCALE_MODE, marker_position, marker_shape, js_data, js_columnar, js_lines, downsample, OHLCPyramid, PYRAMID_INTERVALS, datetime_seconds, infer_interval, is_vbt_indicator, apply_opacity, get_next_color,
+    profiled, profiled_stage, capture_script
 )
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -22,6 +28,7 @@ INDEX = os.path.join(current_dir, 'js', 'index.html')
 
 class Window:
     _id_gen = IDGen()
+    _results = None
     handlers = {}
 
     def __init__(
@@ -34,7 +41,12 @@ class Window:
         self.script_func = script_func
         self.scripts = []
         self.final_scripts = []
-        self.bulk_run = BulkRunScript(script_func)
+        self.bulk_run = BulkRunScript(self._send)
+        self._coalescer = None
+        self._update_lock = threading.Lock()
+        self._batcher = None
+        self.profiler = None
+        self.width = None  # in pixels, when known
 
         if run_script:
             self.run_script = run_script
@@ -49,34 +61,163 @@ class Window:
 
         if hasattr(self, '_return_q'):
             while not self.run_script_and_get('document.readyState == "complete"'):
-                continue    # scary, but works
+                time.sleep(0.01)
 
         initial_script = ''
         self.scripts.extend(self.final_scripts)
         for script in self.scripts:
             initial_script += f'\n{script}'
-        self.script_func(initial_script)
+        self._transfer(initial_script)
 
     def run_script(self, script: str, run_last: bool = False):
         """
         For advanced users; evaluates JavaScript within the Webview.
         """
+        if capture_script(script, run_last):
+            return
         if self.script_func is None:
             raise AttributeError("script_func has not been set")
         if self.loaded:
+            if self._coalescer is not None:
+                self.flush_updates()
             if self.bulk_run.enabled:
                 self.bulk_run.add_script(script)
             else:
-                self.script_func(script)
+                self._send(script)
         elif run_last:
             self.final_scripts.append(script)
         else:
             self.scripts.append(script)
 
-    def run_script_and_get(self, script: str):
-        self.run_script(f'_~_~RETURN~_~_{script}')
-        return self._return_q.get()
+    def coalesce_updates(self, rate: Optional[float] = 60):
+        """
+        Coalesces the live `update` calls of every series in the window. Only the latest pending
+        update per series and bar time is sent, at most `rate` times a second.\n
+        :param rate: flushes per second. `None` sends updates immediately again.
+        """
+        if self.script_func is None:
+            raise AttributeError("script_func has not been set")
+        self.flush_updates()
+        self._coalescer = UpdateCoalescer(1 / rate, self._flush_timer) if rate else None
+
+    def flush_updates(self):
+        """
+        Sends any pending coalesced updates.
+        """
+        coalescer = self._coalescer
+        if coalescer is None:
+            return
+        if self.bulk_run.enabled:
+            # within bulk_run on the main thread, the updates keep their place among its scripts
+            self.bulk_run.scripts.extend(coalescer.take())
+            return
+        self._send_updates(coalescer)
+
+    def _flush_timer(self):
+        # runs on the coalescer's timer thread, which must leave bulk_run to the main thread
+        coalescer = self._coalescer
+        if coalescer is None:
+            return
+        if self.bulk_run.enabled:
+            coalescer.retry()
+            return
+        self._send_updates(coalescer)
+
+    def _send_updates(self, coalescer: UpdateCoalescer):
+        # the lock keeps updates taken by the timer and the main thread in order
+        with self._update_lock:
+            scripts = coalescer.take()
+            if scripts:
+                self._send('\n'.join(scripts))
+
+    def _run_update(self, key: tuple, script: str):
+        if self._coalescer is None or not self.loaded:
+            self.run_script(script)
+        else:
+            self._coalescer.add(key, script)
+
+    @profiled_stage('send')
+    def _transfer(self, script: str):
+        self.script_func(script)
+
+    def _send(self, script: str):
+        if self._batcher is None:
+            self._transfer(script)
+        elif script.startswith('_~_~RETURN~_~_'):
+            # the caller blocks on the result, so this can't wait for the batch
+            self._batcher.flush()
+            self._transfer(script)
+        else:
+            self._batcher.add(script)
+
+    def batch_scripts(self, enabled: bool = True, delay: float = 0.005, max_bytes: int = 1_000_000):
+        """
+        Batches the scripts sent to the window, without needing `bulk_run`. Scripts are sent in
+        order as one evaluation at the end of the current asyncio loop iteration, or after `delay`
+        seconds when no loop is running, or once `max_bytes` are pending.
+        """
+        if self.script_func is None:
+            raise AttributeError("script_func has not been set")
+        if self._batcher is not None:
+            self._batcher.flush()
+        self._batcher = ScriptBatcher(self._transfer, delay, max_bytes) if enabled else None
 
+    def profile(self, enabled: bool = True, round_trip: bool = False) -> Optional[Profiler]:
+        """
+        Records the timings and payload sizes of each stage of the profiled methods called on this window.
+        The returned `Profiler` can be used as a context manager, which stops profiling on exit.\n
+        :param round_trip: also waits after each method until the webview has evaluated its scripts
+        (pywebview charts only). This blocks the caller, so only use it when measuring.
+        """
+        self.profiler = Profiler(self, round_trip) if enabled else None
+        return self.profiler
+
+    def _request(self, script: str) -> tuple:
+        router = Window._results
+        if router is None or router.queue is not self._return_q:
+            # the queue is replaced along with the webview process, so the old one gets no more results
+            if router is not None:
+                router.close()
+            router = Window._results = ResultRouter(self._return_q)
+        request_id, future = router.request()
+        self.run_script(f'_~_~RETURN~_~_{request_id}_~_{script}')
+        return router, request_id, future
+
+    def dispatch(self, *commands: tuple):
+        """
+        Sends `(opcode, target, *args)` commands to the precompiled `Lib.dispatch` instead of generating
+        JS source. Opcodes: `apply` (applyOptions), `assign` (set properties) and `call` (call a method).
+        """
+        payload = orjson.dumps([[opcode, target, list(args)] for opcode, target, *args in commands],
+                               option=orjson.OPT_SERIALIZE_NUMPY)
+        self.run_script(f'Lib.dispatch({payload.decode()})')
+
+    def run_script_and_get(self, script: str, timeout: Optional[float] = None):
+        """
+        Evaluates JavaScript within the Webview and blocks until its result is returned.
+        """
+        router, request_id, future = self._request(script)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            router.discard(request_id)
+            raise TimeoutError(f'No result for "{script}" within {timeout} seconds.')
+
+    async def evaluate(self, script: str, timeout: Optional[float] = None):
+        """
+        Evaluates JavaScript within the Webview and returns its result, without blocking the event loop.
+        """
+        router, request_id, future = self._request(script)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            router.discard(request_id)
+            raise TimeoutError(f'No result for "{script}" within {timeout} seconds.')
+        except asyncio.CancelledError:
+            router.discard(request_id)
+            raise
+
+    @profiled
     def create_table(
         self,
         width: NUM,
@@ -142,6 +283,8 @@ class Window:
 
 
 class SeriesCommon(Pane):
+    _downsample_method = 'lttb'
+
     def __init__(self, chart: 'AbstractChart', name: str = ''):
         super().__init__(chart.win)
         self._chart = chart
@@ -153,33 +296,28 @@ class SeriesCommon(Pane):
         self.name = name
         self.num_decimals = 2
         self.offset = 0
-        self.data = pd.DataFrame()
-        self.markers = {}
+        self._data = BarStore()
+        self._markers = MarkerStore()
+
+    @property
+    def data(self) -> pd.DataFrame:
+        return self._data.frame()
+
+    @data.setter
+    def data(self, df: pd.DataFrame):
+        self._data = BarStore(df)
 
-    def _set_interval(self, df: pd.DataFrame):
+    @property
+    def markers(self) -> dict:
+        return self._markers.to_dict()
+
+    def _set_interval(self, df: pd.DataFrame, index: Optional[pd.Index] = None):
         if not pd.api.types.is_datetime64_any_dtype(df['time']):
             df['time'] = pd.to_datetime(df['time'])
-        common_interval = df['time'].diff().value_counts()
-        if common_interval.empty:
+        result = infer_interval(df['time'], index)
+        if result is None:
             return
-        self._interval = common_interval.index[0].total_seconds()
-
-        units = [
-            pd.Timedelta(microseconds=df['time'].dt.microsecond.value_counts().index[0]),
-            pd.Timedelta(seconds=df['time'].dt.second.value_counts().index[0]),
-            pd.Timedelta(minutes=df['time'].dt.minute.value_counts().index[0]),
-            pd.Timedelta(hours=df['time'].dt.hour.value_counts().index[0]),
-            pd.Timedelta(days=df['time'].dt.day.value_counts().index[0]),
-        ]
-        self.offset = 0
-        for value in units:
-            value = value.total_seconds()
-            if value == 0:
-                continue
-            elif value >= self._interval:
-                break
-            self.offset = value
-            break
+        self._interval, self.offset = result
 
     @staticmethod
     def _format_labels(data, labels, index, exclude_lowercase):
@@ -196,30 +334,28 @@ class SeriesCommon(Pane):
             labels = [*labels, 'time']
         return labels
 
+    @profiled_stage('format')
     def _df_datetime_format(self, df: pd.DataFrame, exclude_lowercase=None):
-        df = df.copy()
+        index = df.index
+        # shallow copy; only the new time columns are allocated, the others reference the caller's data
+        df = df.copy(deep=False)
         df.columns = self._format_labels(df, df.columns, df.index, exclude_lowercase)
-        self._set_interval(df)
-        if not pd.api.types.is_datetime64_any_dtype(df['time']):
-            df['time'] = pd.to_datetime(df['time'])
-        df['time'] = (df['time'].astype('int64') / 10 ** 9).astype(float)
-
-        # if 'updated' in df.columns:
-        #     df['updated'] = pd.to_datetime(df['updated']).astype('int64') / 10**9
+        self._set_interval(df, index)
+        df['time'] = datetime_seconds(df['time'])
 
         # Iterate over all columns and convert any additional datetime columns to timestamps (for example updated)
         for col in df.columns:
             # Skip columns that are explicitly managed elsewhere or meant to be excluded
             if col == 'time' or not pd.api.types.is_datetime64_any_dtype(df[col]):
                 continue
-            # Convert datetime to timestamp with nanosecond precision after the decimal
-            df[col] = (pd.to_datetime(df[col]).astype('int64') / 10**9).astype(float)
+            df[col] = datetime_seconds(df[col])
 
         return df
 
+    @profiled_stage('format')
     def _series_datetime_format(self, series: pd.Series, exclude_lowercase=None):
         series = series.copy()
-        series.index = self._format_labels(series, series.name, series.index, exclude_lowercase)
+        series.index = self._format_labels(series, series.index, series.name, exclude_lowercase)
         series['time'] = self._single_datetime_format(series['time'])
         return series
 
@@ -232,7 +368,25 @@ class SeriesCommon(Pane):
         arg = self._interval * (arg.timestamp() // self._interval)+self.offset
         return arg
 
-    def set(self, df: Optional[Union[pd.DataFrame, pd.Series]] = None, format_cols: bool = True):
+    @profiled_stage('format')
+    def _multi_datetime_format(self, values) -> np.ndarray:
+        # vectorised equivalent of _single_datetime_format
+        values = pd.Series(values)
+        if pd.api.types.is_numeric_dtype(values):
+            values = pd.to_datetime(values, unit='ms')
+        seconds = datetime_seconds(values)
+        return self._interval * (seconds // self._interval) + self.offset
+
+    @profiled
+    def set(self, df: Optional[Union[pd.DataFrame, pd.Series]] = None, format_cols: bool = True,
+            columnar: bool = False, copy: bool = True):
+        """
+        Sets the data of the series.\n
+        :param columnar: sends the data as binary float64 columns rather than a JSON list of records.
+        Recommended for large, numeric-only data.
+        :param copy: if False, the stored data references the columns of `df` instead of copying them.
+        Only use this if `df` will not be mutated afterwards.
+        """
         if df is None or (isinstance(df, pd.DataFrame) and df.empty):
             self.run_script(f'{self.id}.series.setData([])')
             self.data = pd.DataFrame()
@@ -246,28 +400,60 @@ class SeriesCommon(Pane):
             df = self._df_datetime_format(df, exclude_lowercase=self.name)
         if self.name:
             if self.name and len(df.columns) == 1: #if only one col rename it
-                df.columns = ['value']
+                columns = ['value']
             elif self.name not in df:
                 raise NameError(f'No column named "{self.name}".')
             else:
-                df = df.rename(columns={self.name: 'value'})
-        self.data = df.copy()
+                columns = ['value' if col == self.name else col for col in df.columns]
+            df = df.copy(deep=False)
+            df.columns = columns
+        self.data = df.copy() if copy else df
         self._last_bar = df.iloc[-1]
-        self.run_script(f'{self.id}.series.setData({js_data(df)}); ')
+        df = self._downsampled(df)
+        self.run_script(f'{self.id}.series.setData({js_columnar(df) if columnar else js_data(df)}); ')
+
+    def _downsampled(self, df: pd.DataFrame, start_time: Optional[TIME] = None, end_time: Optional[TIME] = None):
+        points = self._chart._max_points
+        if points is None or len(df) <= points:
+            return df
+        if start_time is None and end_time is None:
+            return downsample(df, points, self._downsample_method)
+        # the range keeps its own budget of points, the data around it stays coarse
+        time = df['time'].to_numpy()
+        start = 0 if start_time is None else np.searchsorted(time, self._single_datetime_format(start_time))
+        end = len(df) if end_time is None else np.searchsorted(time, self._single_datetime_format(end_time), 'right')
+        return pd.concat([
+            downsample(part, points, self._downsample_method)
+            for part in (df.iloc[:start], df.iloc[start:end], df.iloc[end:])
+        ])
+
+    def refine(self, start_time: Optional[TIME] = None, end_time: Optional[TIME] = None):
+        """
+        Resends the data of a downsampled series, with full detail between `start_time` and `end_time`.
+        Has no effect unless `downsample` is enabled on the chart.
+        """
+        if self._chart._max_points is None or not len(self._data):
+            return
+        self.run_script(f'{self.id}.series.setData({js_data(self._downsampled(self.data, start_time, end_time))})')
 
+    @profiled
     def update(self, series: pd.Series):
         series = self._series_datetime_format(series, exclude_lowercase=self.name)
         if self.name in series.index:
             series.rename({self.name: 'value'}, inplace=True)
         if self._last_bar is not None and series['time'] != self._last_bar['time']:
-            self.data.loc[self.data.index[-1]] = self._last_bar
-            self.data = pd.concat([self.data, series.to_frame().T], ignore_index=True)
+            self._data.replace_last(self._last_bar)
+            self._data.append(series)
         self._last_bar = series
-        self.run_script(f'{self.id}.series.update({js_data(series)})')
+        self.win._run_update((self.id, series['time']), f'{self.id}.series.update({js_data(series)})')
 
-    def _update_markers(self):
-        self.run_script(f'{self.id}.series.setMarkers({json.dumps(list(self.markers.values()))})')
+    def _add_markers(self, marker_ids):
+        self.run_script(f'Lib.markerStore({self.id}.series).add({self._markers.js(marker_ids)})')
 
+    def _remove_markers(self, marker_ids):
+        self.run_script(f'Lib.markerStore({self.id}.series).remove({json.dumps([int(marker_id) for marker_id in marker_ids])})')
+
+    @profiled
     def markers_set(self, markers: Union[pd.Series, pd.DataFrame],
                     type: MARKER_TYPE = None,
                     col_name: Optional[str] = None,
@@ -327,28 +513,14 @@ class SeriesCommon(Pane):
         else:
             raise ValueError("No matching columns in the dataframe.")
         
-        marker_ids = []
-        #self.markers = {}
-
-        valid_rows = markers[markers['value']]  # Filter rows where value is True
-
-        for timestamp in valid_rows['time']:
-            marker_id = self.win._id_gen.generate()
-            self.markers[marker_id] = {
-                "time": timestamp,
-                "position": marker_position(position),  # Default position
-                "color": color,   # Default color
-                "shape": marker_shape(shape),    # Default shape
-                "text": text,           # Default text
-            }
-            marker_ids.append(marker_id)
-
-        # Sort markers by time
-        self.markers = dict(sorted(self.markers.items(), key=lambda item: item[1]["time"]))
-        self._update_markers()
-        return marker_ids
+        # Filter rows where value is True
+        times = markers['time'].to_numpy()[markers['value'].to_numpy(dtype=bool, na_value=False)]
+        marker_ids = self._markers.add(times, marker_position(position), marker_shape(shape), color, text)
+        self._add_markers(marker_ids)
+        return marker_ids.tolist()
 
 
+    @profiled
     def marker_list(self, markers: list):
         """
         Creates multiple markers.\n
@@ -360,24 +532,22 @@ class SeriesCommon(Pane):
         ]
         :return: a list of marker ids.
         """
-        markers = markers.copy()
-        marker_ids = []
-        for marker in markers:
-            marker_id = self.win._id_gen.generate()
-            self.markers[marker_id] = {
-                "time": self._single_datetime_format(marker['time']),
-                "position": marker_position(marker['position']),
-                "color": marker['color'],
-                "shape": marker_shape(marker['shape']),
-                "text": marker['text'],
-            }
-            marker_ids.append(marker_id)
-        self._update_markers()
-        return marker_ids
+        if not markers:
+            return []
+        marker_ids = self._markers.add(
+            [self._single_datetime_format(marker['time']) for marker in markers],
+            [marker_position(marker['position']) for marker in markers],
+            [marker_shape(marker['shape']) for marker in markers],
+            [marker['color'] for marker in markers],
+            [marker['text'] for marker in markers],
+        )
+        self._add_markers(marker_ids)
+        return marker_ids.tolist()
 
+    @profiled
     def marker(self, time: Optional[datetime] = None, position: MARKER_POSITION = 'below',
                shape: MARKER_SHAPE = 'arrow_up', color: str = '#2196F3', text: str = ''
-               ) -> str:
+               ) -> int:
         """
         Creates a new marker.\n
         :param time: Time location of the marker. If no time is given, it will be placed at the last bar.
@@ -391,24 +561,24 @@ class SeriesCommon(Pane):
             formatted_time = self._last_bar['time'] if not time else self._single_datetime_format(time)
         except TypeError:
             raise TypeError('Chart marker created before data was set.')
-        marker_id = self.win._id_gen.generate()
-
-        self.markers[marker_id] = {
-            "time": formatted_time,
-            "position": marker_position(position),
-            "color": color,
-            "shape": marker_shape(shape),
-            "text": text,
-        }
-        self._update_markers()
+        marker_id = int(self._markers.add(formatted_time, marker_position(position), marker_shape(shape), color, text)[0])
+        self._add_markers([marker_id])
         return marker_id
 
-    def remove_marker(self, marker_id: str):
+    def remove_marker(self, marker_id: int):
         """
         Removes the marker with the given id.\n
         """
-        self.markers.pop(marker_id)
-        self._update_markers()
+        if not self._markers.remove([marker_id]):
+            raise KeyError(marker_id)
+        self._remove_markers([marker_id])
+
+    def remove_markers(self, marker_ids: list):
+        """
+        Removes the markers with the given ids.\n
+        """
+        self._markers.remove(marker_ids)
+        self._remove_markers(marker_ids)
 
     def horizontal_line(self, price: NUM, color: str = 'rgb(122, 146, 202)', width: int = 2,
                         style: LINE_STYLE = 'solid', text: str = '', axis_label_visible: bool = True,
@@ -473,16 +643,15 @@ class SeriesCommon(Pane):
         """
         Clears the markers displayed on the data.\n
         """
-        self.markers.clear()
-        self._update_markers()
+        self._markers.clear()
+        self.run_script(f'Lib.markerStore({self.id}.series).clear()')
 
     def price_line(self, label_visible: bool = True, line_visible: bool = True, title: str = ''):
-        self.run_script(f'''
-        {self.id}.series.applyOptions({{
-            lastValueVisible: {jbool(label_visible)},
-            priceLineVisible: {jbool(line_visible)},
-            title: '{title}',
-        }})''')
+        self.win.dispatch(('apply', f'{self.id}.series', {
+            'lastValueVisible': label_visible,
+            'priceLineVisible': line_visible,
+            'title': title,
+        }))
 
     def precision(self, precision: int):
         """
@@ -490,10 +659,9 @@ class SeriesCommon(Pane):
         :param precision: The number of decimal places.
         """
         min_move = 1 / (10**precision)
-        self.run_script(f'''
-        {self.id}.series.applyOptions({{
-            priceFormat: {{precision: {precision}, minMove: {min_move}}}
-        }})''')
+        self.win.dispatch(('apply', f'{self.id}.series', {
+            'priceFormat': {'precision': precision, 'minMove': min_move}
+        }))
         self.num_decimals = precision
 
     def hide_data(self):
@@ -503,10 +671,10 @@ class SeriesCommon(Pane):
         self._toggle_data(True)
 
     def _toggle_data(self, arg):
-        self.run_script(f'''
-        {self.id}.series.applyOptions({{visible: {jbool(arg)}}})
-        if ('volumeSeries' in {self.id}) {self.id}.volumeSeries.applyOptions({{visible: {jbool(arg)}}})
-        ''')
+        self.win.dispatch(
+            ('apply', f'{self.id}.series', {'visible': arg}),
+            ('apply', f'{self.id}.volumeSeries', {'visible': arg}),
+        )
 
     def vertical_span(
         self,
@@ -576,10 +744,9 @@ class Line(SeriesCommon):
     #     ''')
 
     def scale(self, scale_margin_top: float = 0.0, scale_margin_bottom: float = 0.0):
-        self.run_script(f'''
-        {self.id}.series.priceScale().applyOptions({{
-            scaleMargins: {{top: {scale_margin_top}, bottom: {scale_margin_bottom}}}
-        }})''')
+        self.win.dispatch(('apply', f'{self.id}.series.priceScale()', {
+            'scaleMargins': {'top': scale_margin_top, 'bottom': scale_margin_bottom}
+        }))
 
     def delete(self):
         """
@@ -598,9 +765,12 @@ class Line(SeriesCommon):
             delete {self.id}legendItem
             delete {self.id}
         ''')
+        self._release_id()
 
 
 class Histogram(SeriesCommon):
+    _downsample_method = 'minmax'
+
     def __init__(self, chart, name, color, price_line, price_label, scale_margin_top, scale_margin_bottom):
         super().__init__(chart, name)
         self.color = color
@@ -636,29 +806,44 @@ class Histogram(SeriesCommon):
             delete {self.id}legendItem
             delete {self.id}
         ''')
+        self._release_id()
 
     def scale(self, scale_margin_top: float = 0.0, scale_margin_bottom: float = 0.0):
-        self.run_script(f'''
-        {self.id}.series.priceScale().applyOptions({{
-            scaleMargins: {{top: {scale_margin_top}, bottom: {scale_margin_bottom}}}
-        }})''')
+        self.win.dispatch(('apply', f'{self.id}.series.priceScale()', {
+            'scaleMargins': {'top': scale_margin_top, 'bottom': scale_margin_bottom}
+        }))
 
 
 class Candlestick(SeriesCommon):
+    _downsample_method = 'ohlc'
+
     def __init__(self, chart: 'AbstractChart'):
         super().__init__(chart)
         self._volume_up_color = 'rgba(83,141,131,0.8)'
         self._volume_down_color = 'rgba(200,127,130,0.8)'
         self.num_decimals = 2
-        self.candle_data = pd.DataFrame()
+        self._candle_data = BarStore()
+        self._pyramid = None
 
         # self.run_script(f'{self.id}.makeCandlestickSeries()')
 
-    def set(self, df: Optional[pd.DataFrame] = None, keep_drawings=False):
+    @property
+    def candle_data(self) -> pd.DataFrame:
+        return self._candle_data.frame()
+
+    @candle_data.setter
+    def candle_data(self, df: pd.DataFrame):
+        self._candle_data = BarStore(df)
+
+    @profiled
+    def set(self, df: Optional[pd.DataFrame] = None, keep_drawings=False, columnar: bool = False, copy: bool = True):
         """
         Sets the initial data for the chart.\n
         :param df: columns: date/time, open, high, low, close, volume (if volume enabled).
         :param keep_drawings: keeps any drawings made through the toolbox. Otherwise, they will be deleted.
+        :param columnar: sends the data as binary float64 columns rather than a JSON list of records.
+        :param copy: if False, the stored data references the columns of `df` instead of copying them.
+        Only use this if `df` will not be mutated afterwards.
         """
         if df is None or df.empty:
             self.run_script(f'{self.id}.series.setData([])')
@@ -666,21 +851,19 @@ class Candlestick(SeriesCommon):
             self.candle_data = pd.DataFrame()
             return
         df = self._df_datetime_format(df)
-        self.candle_data = df.copy()
+        self.candle_data = df.copy() if copy else df
         self._last_bar = df.iloc[-1]
-        self.run_script(f'{self.id}.series.setData({js_data(df)})')
-
+        if self._pyramid is not None:
+            self._set_candles(self._pyramid.build(self._candle_data, self._interval), columnar)
+        else:
+            self._set_candles(self._downsampled(df), columnar)
         if 'volume' not in df:
             return
-        volume = df.drop(columns=['open', 'high', 'low', 'close']).rename(columns={'volume': 'value'})
-        volume['color'] = self._volume_down_color
-        volume.loc[df['close'] > df['open'], 'color'] = self._volume_up_color
-        self.run_script(f'{self.id}.volumeSeries.setData({js_data(volume)})')
 
         for line in self._lines:
             if line.name not in df.columns:
                 continue
-            line.set(df[['time', line.name]], format_cols=False)
+            line.set(df[['time', line.name]], format_cols=False, columnar=columnar, copy=copy)
         # set autoScale to true in case the user has dragged the price scale
         self.run_script(f'''
             if (!{self.id}.chart.priceScale("right").options.autoScale)
@@ -692,6 +875,74 @@ class Candlestick(SeriesCommon):
         else:
             self.run_script(f"{self._chart.id}.toolBox?.clearDrawings()")
 
+    def _set_candles(self, df: pd.DataFrame, columnar: bool = False):
+        self.run_script(f'{self.id}.series.setData({js_columnar(df) if columnar else js_data(df)})')
+        if 'volume' in df:
+            self.run_script(f'{self.id}.volumeSeries.setData({self._volume_data(df, columnar)})')
+
+    def _volume_data(self, df: pd.DataFrame, columnar: bool = False) -> str:
+        volume = pd.DataFrame({'time': df['time'], 'value': df['volume']}, copy=False)
+        up = (df['close'] > df['open']).to_numpy()
+        if columnar:
+            return js_columnar(volume, (self._volume_up_color, self._volume_down_color, up))
+        volume['color'] = np.where(up, self._volume_up_color, self._volume_down_color)
+        return js_data(volume)
+
+    @profiled
+    def prepend(self, df: pd.DataFrame):
+        """
+        Adds bars older than the first bar of the chart, without sending the existing bars again.
+        Bars which are not older than the first bar are ignored.\n
+        :param df: columns: date/time, open, high, low, close, volume (if volume enabled).
+        """
+        if df is None or df.empty:
+            return
+        df = self._df_datetime_format(df)
+        if len(self._candle_data):
+            df = df[df['time'] < self.candle_data['time'].iat[0]]
+            if df.empty:
+                return
+        else:
+            self._last_bar = df.iloc[-1]
+        self._candle_data.prepend(df)
+        self.run_script(f'Lib.prependData({self.id}.series, {js_data(df)})')
+        if 'volume' in df:
+            self.run_script(f'Lib.prependData({self.id}.volumeSeries, {self._volume_data(df)})')
+
+    @profiled
+    def extend(self, df: pd.DataFrame):
+        """
+        Adds bars newer than the last bar of the chart, without sending the existing bars again.
+        Bars which are not newer than the last bar are ignored.\n
+        :param df: columns: date/time, open, high, low, close, volume (if volume enabled).
+        """
+        if df is None or df.empty:
+            return
+        df = self._df_datetime_format(df)
+        if self._last_bar is not None:
+            df = df[df['time'] > self._last_bar['time']]
+            if df.empty:
+                return
+            self._candle_data.replace_last(self._last_bar)
+        self._candle_data.extend(df)
+        self._last_bar = df.iloc[-1]
+        self.run_script(f'Lib.appendData({self.id}.series, {js_data(df)})')
+        if 'volume' in df:
+            self.run_script(f'Lib.appendData({self.id}.volumeSeries, {self._volume_data(df)})')
+
+    def refine(self, start_time: Optional[TIME] = None, end_time: Optional[TIME] = None):
+        """
+        Resends the downsampled candles and lines of the chart, with full detail between `start_time` and `end_time`.
+        Has no effect unless `downsample` is enabled.
+        """
+        if self._chart._max_points is None:
+            return
+        if len(self._candle_data):
+            self._set_candles(self._downsampled(self.candle_data, start_time, end_time))
+        for line in self._lines:
+            line.refine(start_time, end_time)
+
+    @profiled
     def update(self, series: pd.Series, _from_tick=False):
         """
         Updates the data from a bar;
@@ -700,18 +951,24 @@ class Candlestick(SeriesCommon):
         """
         series = self._series_datetime_format(series) if not _from_tick else series
         if series['time'] != self._last_bar['time']:
-            self.candle_data.loc[self.candle_data.index[-1]] = self._last_bar
-            self.candle_data = pd.concat([self.candle_data, series.to_frame().T], ignore_index=True)
+            self._candle_data.replace_last(self._last_bar)
+            self._candle_data.append(series)
             self._chart.events.new_bar._emit(self)
 
         self._last_bar = series
-        self.run_script(f'{self.id}.series.update({js_data(series)})')
-        if 'volume' not in series:
+        if self._pyramid is not None and self._pyramid.view is not None:
+            bars = self._update_pyramid(series['time'])
+            if bars is not None:
+                self.win._run_update((self.id, bars['time'].iat[0]), self._bars_script(bars))
             return
-        volume = series.drop(['open', 'high', 'low', 'close']).rename({'volume': 'value'})
-        volume['color'] = self._volume_up_color if series['close'] > series['open'] else self._volume_down_color
-        self.run_script(f'{self.id}.volumeSeries.update({js_data(volume)})')
-
+        script = f'{self.id}.series.update({js_data(series)})'
+        if 'volume' in series:
+            volume = series.drop(['open', 'high', 'low', 'close']).rename({'volume': 'value'})
+            volume['color'] = self._volume_up_color if series['close'] > series['open'] else self._volume_down_color
+            script += f';{self.id}.volumeSeries.update({js_data(volume)})'
+        self.win._run_update((self.id, series['time']), script)
+
+    @profiled
     def update_from_tick(self, series: pd.Series, cumulative_volume: bool = False):
         """
         Updates the data from a tick.\n
@@ -740,6 +997,74 @@ class Candlestick(SeriesCommon):
                 bar['volume'] = series['volume']
         self.update(bar, _from_tick=True)
 
+    @profiled
+    def update_from_ticks(self, ticks: Union[pd.DataFrame, dict], cumulative_volume: bool = False):
+        """
+        Updates the data from a block of ticks, emitting a single script for the whole block.\n
+        :param ticks: columns: date/time, price, volume (if using volume); a DataFrame or a dict of arrays.
+        :param cumulative_volume: Adds the given volume onto the latest bar.
+        """
+        ticks = pd.DataFrame(ticks, copy=False)
+        if ticks.empty:
+            return
+        ticks = ticks.copy(deep=False)
+        ticks.columns = self._format_labels(ticks, ticks.columns, ticks.index, None)
+        times = self._multi_datetime_format(ticks['time'])
+        prices = ticks['price'].to_numpy(dtype=float)
+
+        if (np.diff(times) < 0).any():
+            raise ValueError('Ticks must be sorted by time.')
+        if self._last_bar is not None and times[0] < self._last_bar['time']:
+            raise ValueError(f'Trying to update tick of time "{pd.to_datetime(times[0], unit="s")}", which occurs before the last bar time of "{pd.to_datetime(self._last_bar["time"], unit="s")}".')
+
+        starts = np.flatnonzero(np.r_[True, times[1:] != times[:-1]])
+        ends = np.r_[starts[1:], len(times)] - 1
+        bars = pd.DataFrame({
+            'open': prices[starts],
+            'high': np.maximum.reduceat(prices, starts),
+            'low': np.minimum.reduceat(prices, starts),
+            'close': prices[ends],
+            'time': times[starts],
+        })
+        if 'volume' in ticks:
+            volumes = ticks['volume'].to_numpy(dtype=float)
+            bars['volume'] = np.add.reduceat(volumes, starts) if cumulative_volume else volumes[ends]
+
+        last_bar = self._last_bar
+        if last_bar is not None and bars['time'].iat[0] == last_bar['time']:
+            bars.loc[0, 'open'] = last_bar['open']
+            bars.loc[0, 'high'] = max(last_bar['high'], bars['high'].iat[0])
+            bars.loc[0, 'low'] = min(last_bar['low'], bars['low'].iat[0])
+            if 'volume' in bars and cumulative_volume and 'volume' in last_bar:
+                bars.loc[0, 'volume'] += last_bar['volume']
+
+        for _, row in bars.iterrows():
+            if last_bar is not None and row['time'] != last_bar['time']:
+                self._candle_data.replace_last(last_bar)
+                self._candle_data.append(row)
+                self._chart.events.new_bar._emit(self)
+            last_bar = row
+        self._last_bar = last_bar
+
+        if self._pyramid is not None and self._pyramid.view is not None:
+            bars = self._update_pyramid(bars['time'].iat[0])
+            if bars is None:
+                return
+        self.run_script(self._bars_script(bars))
+
+    def _bars_script(self, bars: pd.DataFrame) -> str:
+        script = f'{js_data(bars)}.forEach((bar) => {self.id}.series.update(bar));'
+        if 'volume' in bars:
+            volume = pd.DataFrame({'time': bars['time'], 'value': bars['volume']}, copy=False)
+            volume['color'] = np.where(bars['close'] > bars['open'], self._volume_up_color, self._volume_down_color)
+            script += f'{js_data(volume)}.forEach((bar) => {self.id}.volumeSeries.update(bar));'
+        return script
+
+    def _update_pyramid(self, start_time: float) -> Optional[pd.DataFrame]:
+        # the levels are aggregated from the stored bars, so the bar in progress is stored as well
+        self._candle_data.replace_last(self._last_bar)
+        return self._pyramid.update(start_time)
+
     def price_scale(
         self,
         auto_scale: bool = True,
@@ -769,22 +1094,21 @@ class Candlestick(SeriesCommon):
     #     }})''')
     #     self.num_decimals = precision
 
-        self.run_script(f'''
-            {self.id}.series.priceScale().applyOptions({{
-                priceFormat: {{ precision: 3, minMove: 0.005 }},
-                autoScale: {jbool(auto_scale)},
-                mode: {as_enum(mode, PRICE_SCALE_MODE)},
-                invertScale: {jbool(invert_scale)},
-                alignLabels: {jbool(align_labels)},
-                scaleMargins: {{top: {scale_margin_top}, bottom: {scale_margin_bottom}}},
-                borderVisible: {jbool(border_visible)},
-                {f'borderColor: "{border_color}",' if border_color else ''}
-                {f'textColor: "{text_color}",' if text_color else ''}
-                entireTextOnly: {jbool(entire_text_only)},
-                visible: {jbool(visible)},
-                ticksVisible: {jbool(ticks_visible)},
-                minimumWidth: {minimum_width}
-            }})''')
+        self.win.dispatch(('apply', f'{self.id}.series.priceScale()', {
+            'priceFormat': {'precision': 3, 'minMove': 0.005},
+            'autoScale': auto_scale,
+            'mode': as_enum(mode, PRICE_SCALE_MODE),
+            'invertScale': invert_scale,
+            'alignLabels': align_labels,
+            'scaleMargins': {'top': scale_margin_top, 'bottom': scale_margin_bottom},
+            'borderVisible': border_visible,
+            **({'borderColor': border_color} if border_color else {}),
+            **({'textColor': text_color} if text_color else {}),
+            'entireTextOnly': entire_text_only,
+            'visible': visible,
+            'ticksVisible': ticks_visible,
+            'minimumWidth': minimum_width,
+        }))
 
     def candle_style(
             self, up_color: str = 'rgba(39, 157, 130, 100)', down_color: str = 'rgba(200, 97, 100, 100)',
@@ -798,7 +1122,7 @@ class Candlestick(SeriesCommon):
         border_down_color = border_down_color if border_down_color else down_color
         wick_up_color = wick_up_color if wick_up_color else up_color
         wick_down_color = wick_down_color if wick_down_color else down_color
-        self.run_script(f"{self.id}.series.applyOptions({js_json(locals())})")
+        self.win.dispatch(('apply', f'{self.id}.series', camel_options(locals())))
 
     def volume_config(self, scale_margin_top: float = 0.8, scale_margin_bottom: float = 0.0,
                       up_color='rgba(83,141,131,0.8)', down_color='rgba(200,127,130,0.8)'):
@@ -809,13 +1133,9 @@ class Candlestick(SeriesCommon):
         """
         self._volume_up_color = up_color if up_color else self._volume_up_color
         self._volume_down_color = down_color if down_color else self._volume_down_color
-        self.run_script(f'''
-        {self.id}.volumeSeries.priceScale().applyOptions({{
-            scaleMargins: {{
-            top: {scale_margin_top},
-            bottom: {scale_margin_bottom},
-            }}
-        }})''')
+        self.win.dispatch(('apply', f'{self.id}.volumeSeries.priceScale()', {
+            'scaleMargins': {'top': scale_margin_top, 'bottom': scale_margin_bottom}
+        }))
 
 
 class AbstractChart(Candlestick, Pane):
@@ -825,13 +1145,14 @@ class AbstractChart(Candlestick, Pane):
         Pane.__init__(self, window)
 
         self._lines = []
+        self._max_points = None
+        self._provider = None
         self._scale_candles_only = scale_candles_only
         self._width = width
         self._height = height
         self.events: Events = Events(self)
 
-        from lightweight_charts.polygon import PolygonAPI
-        self.polygon: PolygonAPI = PolygonAPI(self)
+        self._polygon = None
 
         self.run_script(
             f'{self.id} = new Lib.Handler("{self.id}", {width}, {height}, "{position}", {jbool(autosize)}, {jbool(leftScale)})')
@@ -842,12 +1163,21 @@ class AbstractChart(Candlestick, Pane):
         if toolbox:
             self.toolbox: ToolBox = ToolBox(self)
 
+    @property
+    def polygon(self) -> 'PolygonAPI':
+        # created on first access, as polygon imports pywebview
+        if self._polygon is None:
+            from lightweight_charts.polygon import PolygonAPI
+            self._polygon = PolygonAPI(self)
+        return self._polygon
+
     def fit(self):
         """
         Fits the maximum amount of the chart data within the viewport.
         """
-        self.run_script(f'{self.id}.chart.timeScale().fitContent()')
+        self.win.dispatch(('call', f'{self.id}.chart.timeScale()', 'fitContent'))
 
+    @profiled
     def create_line(
             self, name: str = '', color: str = None,
             style: LINE_STYLE = 'solid', width: int = 2,
@@ -861,6 +1191,57 @@ class AbstractChart(Candlestick, Pane):
         self._lines.append(Line(self, name, color, style, width, price_line, price_label, True, priceScaleId))
         return self._lines[-1]
 
+    @profiled
+    def set_lines(self, df: pd.DataFrame, names: Optional[list] = None, lines: Optional[List[Line]] = None,
+                  **kwargs) -> List[Line]:
+        """
+        Creates a line for each column of a DataFrame and sets their data at once.
+        The time axis is formatted and sent once, rather than once per line.\n
+        :param df: a time or date column is used as the time axis, as with `set`, otherwise the index.
+        The other columns must be numeric.
+        :param names: the names of the lines, defaulting to the column names.
+        :param lines: lines created beforehand with `create_line`, one per column, which are set instead.
+        :param kwargs: passed to `create_line` for each line.
+        :return: the lines, in the order of the columns.
+        """
+        if isinstance(df, pd.Series):
+            df = df.to_frame()
+        time_col = next((col for col in df.columns if str(col).lower() in ('time', 'date')), None)
+        if time_col is None:
+            # an empty frame of string labels, so only the index is formatted
+            times = pd.DataFrame(index=df.index, columns=pd.Index([], dtype=object))
+        else:
+            times, df = df[[time_col]], df.drop(columns=time_col)
+        for col, dtype in df.dtypes.items():
+            if not (pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_bool_dtype(dtype)):
+                raise TypeError(f'Column "{col}" is not numeric ({dtype}).')
+        if lines is not None:
+            if len(lines) != len(df.columns):
+                raise ValueError(f'{len(lines)} lines given for {len(df.columns)} columns.')
+        else:
+            names = [str(col) for col in df.columns] if names is None else list(names)
+            if len(names) != len(df.columns):
+                raise ValueError(f'{len(names)} names given for {len(df.columns)} columns.')
+            lines = [self.create_line(name, **kwargs) for name in names]
+        if not lines or df.empty:
+            return lines
+
+        time = lines[0]._df_datetime_format(times)['time'].to_numpy()
+        values = df.to_numpy(dtype=float, na_value=np.nan)
+        for i, line in enumerate(lines):
+            line._interval, line.offset = lines[0]._interval, lines[0].offset
+            line._data = BarStore.from_columns({'time': time, 'value': values[:, i]})
+            line._last_bar = pd.Series({'time': time[-1], 'value': values[-1, i]})
+
+        if self._max_points is not None and len(time) > self._max_points:
+            # each line keeps different points, so the time axis can't be shared
+            for line in lines:
+                line.refine()
+            return lines
+        self.run_script(js_lines([f'{line.id}.series' for line in lines], time, values))
+        return lines
+
+    @profiled
     def create_histogram(
             self, name: str = '', color: str = None,
             price_line: bool = False, price_label: bool = True,
@@ -883,13 +1264,76 @@ class AbstractChart(Candlestick, Pane):
         """
         return self._lines.copy()
 
+    def downsample(self, enabled: bool = True, points: Optional[int] = None):
+        """
+        Downsamples the data sent by `set` for the candles, lines and histograms of this chart,
+        to about one point per pixel. Lines keep their shape through LTTB, histograms keep their
+        min/max envelope and candles are aggregated into wider bars.
+        The full data is kept, and `refine` resends it with full detail within a time range.\n
+        :param points: the number of points to send per series, defaulting to the width of the chart in pixels.
+        """
+        self._max_points = self._points(points) if enabled else None
+
+    def pyramid(self, enabled: bool = True, points: Optional[int] = None, intervals: tuple = PYRAMID_INTERVALS):
+        """
+        Sends the candles from a pyramid of levels aggregated to `intervals` (in seconds), which is built by `set`.
+        The coarsest level is sent first; as the user zooms, the finest level showing at most `points` bars in
+        the visible range is swapped in around it, through the `range_change` event.
+        Live updates are aggregated into every level, and sent at the level shown.\n
+        :param points: the number of bars to show, defaulting to the width of the chart in pixels.
+        """
+        if not enabled:
+            self.events.range_change -= self._zoom_pyramid
+            self._pyramid = None
+            return
+        if self._pyramid is None:
+            self.events.range_change += self._zoom_pyramid
+        self._pyramid = OHLCPyramid(self._points(points), intervals)
+        if len(self._candle_data):
+            self._set_candles(self._pyramid.build(self._candle_data, self._interval))
+
+    def _zoom_pyramid(self, chart, bars_before, bars_after):
+        zoomed = self._pyramid.zoom(bars_before, bars_after)
+        if zoomed is None:
+            return
+        bars, start, end = zoomed
+        self._set_candles(bars)
+        # the logical range changes with the bars, keep the visible times
+        self.win.dispatch(('call', f'{self.id}.chart.timeScale()', 'setVisibleRange', {'from': start, 'to': end}))
+
+    def data_provider(self, older: Optional[Callable] = None, newer: Optional[Callable] = None,
+                      threshold: int = 50) -> Optional[DataProvider]:
+        """
+        Loads chunks of bars as the user scrolls towards either end of the data, through the `range_change` event.
+        Chunks are added with `prepend` and `extend`, so the bars already on the chart are not sent again.\n
+        :param older: returns the bars before a given time, see `DataProvider`.
+        :param newer: returns the bars after a given time.
+        :param threshold: a chunk is loaded when fewer bars than this are left beyond the visible range.
+        :return: the provider; its `exhausted` set holds the directions without more data. Passing no sources removes it.
+        """
+        if self._provider is not None:
+            self.events.range_change -= self._provider.on_range_change
+            self.events.range_change -= self._provider.on_range_change_async
+            self._provider = None
+        if older is None and newer is None:
+            return None
+        self._provider = DataProvider(self, older, newer, threshold)
+        if self._provider.is_async:
+            self.events.range_change += self._provider.on_range_change_async
+        else:
+            self.events.range_change += self._provider.on_range_change
+        return self._provider
+
+    def _points(self, points: Optional[int] = None) -> int:
+        if points is not None:
+            return int(points)
+        return max(round((self.win.width or 1000) * self._width), 3)
+
     def set_visible_range(self, start_time: TIME, end_time: TIME):
-        self.run_script(f'''
-        {self.id}.chart.timeScale().setVisibleRange({{
-            from: {pd.to_datetime(start_time).timestamp()},
-            to: {pd.to_datetime(end_time).timestamp()}
-        }})
-        ''')
+        self.win.dispatch(('call', f'{self.id}.chart.timeScale()', 'setVisibleRange', {
+            'from': pd.to_datetime(start_time).timestamp(),
+            'to': pd.to_datetime(end_time).timestamp()
+        }))
 
     def resize(self, width: Optional[float] = None, height: Optional[float] = None):
         """
@@ -898,11 +1342,10 @@ class AbstractChart(Candlestick, Pane):
         """
         self._width = width if width is not None else self._width
         self._height = height if height is not None else self._height
-        self.run_script(f'''
-        {self.id}.scale.width = {self._width}
-        {self.id}.scale.height = {self._height}
-        {self.id}.reSize()
-        ''')
+        self.win.dispatch(
+            ('assign', f'{self.id}.scale', {'width': self._width, 'height': self._height}),
+            ('call', self.id, 'reSize'),
+        )
 
     def time_scale(self, right_offset: int = 0, min_bar_spacing: float = 0.5,
                    visible: bool = True, time_visible: bool = True, seconds_visible: bool = False,
@@ -910,7 +1353,7 @@ class AbstractChart(Candlestick, Pane):
         """
         Options for the timescale of the chart.
         """
-        self.run_script(f'''{self.id}.chart.applyOptions({{timeScale: {js_json(locals())}}})''')
+        self.win.dispatch(('apply', f'{self.id}.chart', {'timeScale': camel_options(locals())}))
 
     def layout(self, background_color: str = '#000000', text_color: Optional[str] = None,
                font_size: Optional[int] = None, font_family: Optional[str] = None):
@@ -932,21 +1375,10 @@ class AbstractChart(Candlestick, Pane):
         """
         Grid styling for the chart.
         """
-        self.run_script(f"""
-           {self.id}.chart.applyOptions({{
-           grid: {{
-               vertLines: {{
-                   visible: {jbool(vert_enabled)},
-                   color: "{color}",
-                   style: {as_enum(style, LINE_STYLE)},
-               }},
-               horzLines: {{
-                   visible: {jbool(horz_enabled)},
-                   color: "{color}",
-                   style: {as_enum(style, LINE_STYLE)},
-               }},
-           }}
-           }})""")
+        self.win.dispatch(('apply', f'{self.id}.chart', {'grid': {
+            'vertLines': {'visible': vert_enabled, 'color': color, 'style': as_enum(style, LINE_STYLE)},
+            'horzLines': {'visible': horz_enabled, 'color': color, 'style': as_enum(style, LINE_STYLE)},
+        }}))
 
     def crosshair(
         self,
@@ -965,40 +1397,34 @@ class AbstractChart(Candlestick, Pane):
         """
         Crosshair formatting for its vertical and horizontal axes.
         """
-        self.run_script(f'''
-        {self.id}.chart.applyOptions({{
-            crosshair: {{
-                mode: {as_enum(mode, CROSSHAIR_MODE)},
-                vertLine: {{
-                    visible: {jbool(vert_visible)},
-                    width: {vert_width},
-                    {f'color: "{vert_color}",' if vert_color else ''}
-                    style: {as_enum(vert_style, LINE_STYLE)},
-                    labelBackgroundColor: "{vert_label_background_color}"
-                }},
-                horzLine: {{
-                    visible: {jbool(horz_visible)},
-                    width: {horz_width},
-                    {f'color: "{horz_color}",' if horz_color else ''}
-                    style: {as_enum(horz_style, LINE_STYLE)},
-                    labelBackgroundColor: "{horz_label_background_color}"
-                }}
-            }}
-        }})''')
+        self.win.dispatch(('apply', f'{self.id}.chart', {'crosshair': {
+            'mode': as_enum(mode, CROSSHAIR_MODE),
+            'vertLine': {
+                'visible': vert_visible,
+                'width': vert_width,
+                **({'color': vert_color} if vert_color else {}),
+                'style': as_enum(vert_style, LINE_STYLE),
+                'labelBackgroundColor': vert_label_background_color,
+            },
+            'horzLine': {
+                'visible': horz_visible,
+                'width': horz_width,
+                **({'color': horz_color} if horz_color else {}),
+                'style': as_enum(horz_style, LINE_STYLE),
+                'labelBackgroundColor': horz_label_background_color,
+            },
+        }}))
 
     def watermark(self, text: str, font_size: int = 44, color: str = 'rgba(180, 180, 200, 0.5)'):
         """
         Adds a watermark to the chart.
         """
-        self.run_script(f'''
-          {self.id}.chart.applyOptions({{
-              watermark: {{
-                  visible: true,
-                  horzAlign: 'center',
-                  vertAlign: 'center',
-                  ...{js_json(locals())}
-              }}
-          }})''')
+        self.win.dispatch(('apply', f'{self.id}.chart', {'watermark': {
+            'visible': True,
+            'horzAlign': 'center',
+            'vertAlign': 'center',
+            **camel_options(locals()),
+        }}))
 
     def legend(self, visible: bool = False, ohlc: bool = True, percent: bool = True, lines: bool = True,
                color: str = 'rgb(191, 195, 203)', font_size: int = 11, font_family: str = 'Monaco',
@@ -1008,28 +1434,27 @@ class AbstractChart(Candlestick, Pane):
         """
         l_id = f'{self.id}.legend'
         if not visible:
-            self.run_script(f'''
-            {l_id}.div.style.display = "none"
-            {l_id}.ohlcEnabled = false
-            {l_id}.percentEnabled = false
-            {l_id}.linesEnabled = false
-            ''')
+            self.win.dispatch(
+                ('assign', f'{l_id}.div.style', {'display': 'none'}),
+                ('assign', l_id, {'ohlcEnabled': False, 'percentEnabled': False, 'linesEnabled': False}),
+            )
             return
-        self.run_script(f'''
-        {l_id}.div.style.display = 'flex'
-        {l_id}.ohlcEnabled = {jbool(ohlc)}
-        {l_id}.percentEnabled = {jbool(percent)}
-        {l_id}.linesEnabled = {jbool(lines)}
-        {l_id}.colorBasedOnCandle = {jbool(color_based_on_candle)}
-        {l_id}.div.style.color = '{color}'
-        {l_id}.color = '{color}'
-        {l_id}.div.style.fontSize = '{font_size}px'
-        {l_id}.div.style.fontFamily = '{font_family}'
-        {l_id}.text.innerText = '{text}'
-        ''')
+        self.win.dispatch(
+            ('assign', f'{l_id}.div.style', {
+                'display': 'flex', 'color': color, 'fontSize': f'{font_size}px', 'fontFamily': font_family
+            }),
+            ('assign', l_id, {
+                'ohlcEnabled': ohlc,
+                'percentEnabled': percent,
+                'linesEnabled': lines,
+                'colorBasedOnCandle': color_based_on_candle,
+                'color': color,
+            }),
+            ('assign', f'{l_id}.text', {'innerText': text}),
+        )
 
     def spinner(self, visible):
-        self.run_script(f"{self.id}.spinner.style.display = '{'block' if visible else 'none'}'")
+        self.win.dispatch(('assign', f'{self.id}.spinner.style', {'display': 'block' if visible else 'none'}))
 
     def hotkey(self, modifier_key: Literal['ctrl', 'alt', 'shift', 'meta', None],
                keys: Union[str, tuple, int], func: Callable):
@@ -1056,6 +1481,7 @@ class AbstractChart(Candlestick, Pane):
                     }})''')
         self.win.handlers[f'{modifier_key, keys}'] = func
 
+    @profiled
     def create_table(
         self,
         width: NUM,
@@ -1085,6 +1511,14 @@ class AbstractChart(Candlestick, Pane):
         serial_data = self.win.run_script_and_get(f'{self.id}.chart.takeScreenshot().toDataURL()')
         return b64decode(serial_data.split(',')[1])
 
+    async def screenshot_async(self, timeout: Optional[float] = None) -> bytes:
+        """
+        Takes a screenshot without blocking the event loop, so several can be taken concurrently.
+        :return: a bytes object containing a screenshot of the chart.
+        """
+        serial_data = await self.win.evaluate(f'{self.id}.chart.takeScreenshot().toDataURL()', timeout)
+        return b64decode(serial_data.split(',')[1])
+
     def create_subchart(self, position: FLOAT = 'left', width: float = 0.5, height: float = 0.5,
                         sync: Optional[Union[str, bool]] = None, scale_candles_only: bool = False,
                         sync_crosshairs_only: bool = False,
@@ -1094,3 +1528,30 @@ class AbstractChart(Candlestick, Pane):
         args = locals()
         del args['self']
         return self.win.create_subchart(*args.values())
+
+    def coalesce_updates(self, rate: Optional[float] = 60):
+        """
+        Coalesces the live `update` calls of every series in the window. Only the latest pending
+        update per series and bar time is sent, at most `rate` times a second.\n
+        :param rate: flushes per second. `None` sends updates immediately again.
+        """
+        self.win.coalesce_updates(rate)
+
+    def batch_scripts(self, enabled: bool = True, delay: float = 0.005, max_bytes: int = 1_000_000):
+        """
+        Batches the scripts sent to the window, without needing `bulk_run`. Scripts are sent in
+        order as one evaluation at the end of the current asyncio loop iteration, or after `delay`
+        seconds when no loop is running, or once `max_bytes` are pending.
+        """
+        self.win.batch_scripts(enabled, delay, max_bytes)
+
+    def profile(self, enabled: bool = True, round_trip: bool = False) -> Optional[Profiler]:
+        """
+        Records the timings and payload sizes of each stage of the profiled methods called on this window.
+        The returned `Profiler` can be used as a context manager, which stops profiling on exit.
+        """
+        return self.win.profile(enabled, round_trip)
+
+
+# registers the `lw` pandas accessors for any import order of the package and pandas
+from . import helpers
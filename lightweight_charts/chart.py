@@ -1,8 +1,13 @@
 import asyncio
+import atexit
+import itertools
 import json
 import multiprocessing as mp
+import queue
+import sys
 import typing
 import webview
+from multiprocessing.shared_memory import SharedMemory
 from webview.errors import JavascriptException
 
 from lightweight_charts import abstract
@@ -12,6 +17,60 @@ import os
 import threading
 
 
+class SharedScriptBuffer:
+    """
+    A ring buffer of UTF-8 scripts in shared memory, written by the main process and read in
+    order by the webview process. Only `(start, length)` descriptors go over the call queue.
+    """
+    def __init__(self, shm: SharedMemory, read_pos):
+        self.shm = shm
+        self.read_pos = read_pos    # total bytes consumed by the reader
+        self.write_pos = 0          # total bytes written, only used by the writer
+
+    @classmethod
+    def create(cls, size: int, read_pos):
+        read_pos.value = 0
+        return cls(SharedMemory(create=True, size=size), read_pos)
+
+    @classmethod
+    def attach(cls, name: str, read_pos):
+        try:
+            shm = SharedMemory(name=name, track=False)
+        except TypeError:
+            # python < 3.13; the webview process shares the main process's resource tracker
+            shm = SharedMemory(name=name)
+        return cls(shm, read_pos)
+
+    def write(self, script: str) -> typing.Optional[tuple]:
+        """
+        Copies the script into the buffer, returning None if there isn't enough free space.
+        """
+        data = memoryview(script.encode('utf-8'))
+        size = self.shm.size
+        if len(data) > size - (self.write_pos - self.read_pos.value):
+            return None
+        start = self.write_pos % size
+        first = min(len(data), size - start)
+        self.shm.buf[start:start + first] = data[:first]
+        self.shm.buf[:len(data) - first] = data[first:]
+        self.write_pos += len(data)
+        return 'shared_memory', start, len(data)
+
+    def read(self, start: int, length: int) -> str:
+        end = start + length
+        if end <= self.shm.size:
+            script = str(self.shm.buf[start:end], 'utf-8')
+        else:
+            script = (bytes(self.shm.buf[start:]) + bytes(self.shm.buf[:end - self.shm.size])).decode('utf-8')
+        self.read_pos.value += length
+        return script
+
+    def close(self, unlink: bool = False):
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
 class CallbackAPI:
     def __init__(self, emit_queue):
         self.emit_queue = emit_queue
@@ -21,11 +80,16 @@ class CallbackAPI:
 
 
 class PyWV:
-    def __init__(self, q, emit_q, return_q, loaded_event):
+    def __init__(self, q, emit_q, return_q, loaded_event, read_pos=None, recycle_q=None):
         self.queue = q
         self.return_queue = return_q
         self.emit_queue = emit_q
         self.loaded_event = loaded_event
+        self.read_pos = read_pos
+        self.recycle_queue = recycle_q
+        self.shared_buffer = None
+        self.recycled = set()   # windows waiting for their next chart, which ignore scripts of the last one
+        self.tokens = {}        # window number -> token of the chart using it
 
         self.is_alive = True
 
@@ -36,7 +100,7 @@ class PyWV:
 
     def create_window(
         self, width, height, x, y, screen=None, on_top=False,
-        maximize=False, title=''
+        maximize=False, title='', hidden=False, reusable=False, token=None
     ):
         screen = webview.screens[screen] if screen is not None else None
         if maximize:
@@ -56,10 +120,44 @@ class PyWV:
             y=y,
             screen=screen,
             on_top=on_top,
+            hidden=hidden,
             background_color='#000000')
         )
 
         self.windows[-1].events.loaded += lambda: self.loaded_event.set()
+        i = len(self.windows) - 1
+        self.tokens[i] = token
+        if reusable:
+            self.windows[-1].events.closing += lambda: self._close_reusable(i)
+        else:
+            # hidden standby windows keep webview running, so 'exit' may not come
+            self.windows[-1].events.closed += lambda: self.emit_queue.put(f'_~_~CLOSED~_~_{self.tokens[i]}')
+
+    def _close_reusable(self, i):
+        # the window is hidden and reset by the loop instead, keeping its page loaded
+        self.queue.put((i, 'close'))
+        return False
+
+    def configure_window(self, i, width, height, x, y, on_top, maximize, title, token):
+        window = self.windows[i]
+        window.title = title
+        window.resize(width, height)
+        if x is not None and y is not None:
+            window.move(x, y)
+        window.on_top = on_top
+        if maximize:
+            window.maximize()
+        self.tokens[i] = token
+        self.recycled.discard(i)
+
+    def recycle_window(self, i, closed: bool):
+        window = self.windows[i]
+        window.hide()
+        window.evaluate_js('Lib.resetPage()')
+        self.recycled.add(i)
+        self.recycle_queue.put(i)
+        if closed:
+            self.emit_queue.put(f'_~_~CLOSED~_~_{self.tokens[i]}')
 
 
     def loop(self):
@@ -75,16 +173,38 @@ class PyWV:
             if i == 'create_window':
                 self.create_window(*arg)
                 continue
+            if i == 'configure':
+                self.configure_window(*arg)
+                continue
+            if i == 'shared_memory':
+                self.shared_buffer = SharedScriptBuffer.attach(arg, self.read_pos)
+                continue
 
             window = self.windows[i]
-            if arg == 'show':
+            if isinstance(arg, tuple):
+                arg = self.shared_buffer.read(*arg[1:])
+            if arg in ('close', 'recycle'):
+                if i not in self.recycled:
+                    self.recycle_window(i, closed=arg == 'close')
+            elif i in self.recycled:
+                if arg.startswith('_~_~RETURN~_~_'):
+                    # answered, so that the caller doesn't wait for a window its chart no longer has
+                    request_id = arg[14:].split('_~_', 1)[0]
+                    self.return_queue.put((int(request_id), None, RuntimeError('The chart window was closed.')))
+                continue
+            elif arg == 'show':
                 window.show()
             elif arg == 'hide':
                 window.hide()
             else:
                 try:
-                    if '_~_~RETURN~_~_' in arg:
-                        self.return_queue.put(window.evaluate_js(arg[14:]))
+                    if arg.startswith('_~_~RETURN~_~_'):
+                        request_id, script = arg[14:].split('_~_', 1)
+                        try:
+                            result = (window.evaluate_js(script), None)
+                        except JavascriptException as e:
+                            result = (None, e)
+                        self.return_queue.put((int(request_id), *result))
                     else:
                         window.evaluate_js(arg)
                 except KeyError as e:
@@ -94,41 +214,167 @@ class PyWV:
                     raise JavascriptException(f"\n\nscript -> '{arg}',\nerror -> {msg['name']}[{msg['line']}:{msg['column']}]\n{msg['message']}")
 
 
+class MessageRouter:
+    """
+    Reads the emit queue in a single thread and routes each message to the `asyncio.Queue` of a reader,
+    so that charts showing at the same time can't take each other's messages.
+    Window closed messages go to the reader of the chart's token, 'exit' and None go to every reader
+    and callbacks go to one reader, as all charts share their handlers.
+    """
+    def __init__(self, emit_queue, on_exit: typing.Callable = None):
+        self.queue = emit_queue
+        self.on_exit = on_exit  # called with the router when the webview process ends by itself
+        self._readers = {}      # token -> (loop, messages)
+        self._pending = []      # callbacks which arrived while no chart was reading
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def subscribe(self, token, loop: asyncio.AbstractEventLoop, messages: asyncio.Queue):
+        with self._lock:
+            self._readers[str(token)] = (loop, messages)
+            pending, self._pending = self._pending, []
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        for message in pending:
+            self._put(loop, messages, message)
+
+    def unsubscribe(self, token):
+        with self._lock:
+            self._readers.pop(str(token), None)
+
+    def wake(self, token) -> bool:
+        """
+        Sends None to the reader of the token, returning False if the chart has no reader.
+        """
+        with self._lock:
+            reader = self._readers.get(str(token))
+        if reader is None:
+            return False
+        self._put(*reader, None)
+        return True
+
+    def close(self):
+        # ends the thread and the readers, once the webview process is gone
+        self.queue.put('exit')
+
+    @staticmethod
+    def _put(loop, messages, message):
+        try:
+            loop.call_soon_threadsafe(messages.put_nowait, message)
+        except RuntimeError:    # the loop has been closed
+            pass
+
+    def _run(self):
+        # blocks on the emit queue in a thread, so callbacks reach the event loops without polling
+        while True:
+            message = self.queue.get()
+            with self._lock:
+                if message is None or message == 'exit':
+                    readers = list(self._readers.values())
+                elif message.startswith('_~_~CLOSED~_~_'):
+                    readers = [self._readers[message[14:]]] if message[14:] in self._readers else []
+                elif self._readers:
+                    readers = [next(iter(self._readers.values()))]
+                else:
+                    readers = []
+                    self._pending.append(message)
+            if message == 'exit' and self.on_exit is not None:
+                self.on_exit(self)
+            for loop, messages in readers:
+                self._put(loop, messages, message)
+            if message == 'exit':
+                return
+
+
 class WebviewHandler():
+    # scripts at least this long are sent through shared memory rather than pickled
+    shared_memory_threshold = 64 * 1024
+    shared_memory_size = 64 * 1024 * 1024
+
     def __init__(self) -> None:
+        self.shared_buffer = None
+        self.reuse_windows = False
+        self._tokens = itertools.count()
+        self._exit_lock = threading.Lock()
         self._reset()
         self.debug = False
+        atexit.register(self._close_shared_buffer)
 
     def _reset(self):
         self.loaded_event = mp.Event()
         self.return_queue = mp.Queue()
         self.function_call_queue = mp.Queue()
         self.emit_queue = mp.Queue()
+        self.router = MessageRouter(self.emit_queue, self.exit)
+        self.read_pos = mp.Value('q', 0)
+        self.recycle_queue = mp.Queue()
         self.wv_process = mp.Process(
             target=PyWV, args=(
                 self.function_call_queue, self.emit_queue,
-                self.return_queue, self.loaded_event
+                self.return_queue, self.loaded_event, self.read_pos, self.recycle_queue
             ),
             daemon=True
         )
         self.max_window_num = -1
+        self.standby = []   # loaded, hidden windows ready for the next chart
+        self._write_lock = threading.Lock()
+        self._close_shared_buffer()
+
+    def _close_shared_buffer(self):
+        if self.shared_buffer is not None:
+            self.shared_buffer.close(unlink=True)
+            self.shared_buffer = None
 
     def create_window(
         self, width, height, x, y, screen=None, on_top=False,
-        maximize=False, title=''
+        maximize=False, title='', hidden=False, token=None
     ):
         self.function_call_queue.put((
             'create_window',
-            (width, height, x, y, screen, on_top, maximize, title)
+            (width, height, x, y, screen, on_top, maximize, title, hidden, self.reuse_windows, token)
         ))
         self.max_window_num += 1
         return self.max_window_num
 
-    def start(self):
+    def take_window(
+        self, width, height, x, y, screen=None, on_top=False,
+        maximize=False, title=''
+    ) -> tuple:
+        """
+        Returns `(window_num, token)`, reconfiguring a loaded standby window when one is available.
+        The token identifies the chart using the window, as window numbers are reused.
+        """
+        token = next(self._tokens)
+        while True:
+            try:
+                self.standby.append(self.recycle_queue.get_nowait())
+            except queue.Empty:
+                break
+        if not self.standby:
+            return self.create_window(width, height, x, y, screen, on_top, maximize, title, token=token), token
+        window_num = self.standby.pop()
+        self.function_call_queue.put((
+            'configure',
+            (window_num, width, height, x, y, on_top, maximize, title, token)
+        ))
+        return window_num, token
+
+    def prewarm(self, width=800, height=600, reuse=True):
+        self.reuse_windows = reuse
+        self.standby.append(self.create_window(width, height, None, None, hidden=True))
+        if not self.wv_process.is_alive():
+            self.start(wait=False)
+
+    def start(self, wait: bool = True):
         self.loaded_event.clear()
+        if self.shared_memory_size:
+            self.shared_buffer = SharedScriptBuffer.create(self.shared_memory_size, self.read_pos)
+            self.function_call_queue.put(('shared_memory', self.shared_buffer.shm.name))
         self.wv_process.start()
         self.function_call_queue.put(('start', self.debug))
-        self.loaded_event.wait()
+        if wait:
+            self.loaded_event.wait()
 
     def show(self, window_num):
         self.function_call_queue.put((window_num, 'show'))
@@ -136,14 +382,33 @@ class WebviewHandler():
     def hide(self, window_num):
         self.function_call_queue.put((window_num, 'hide'))
 
+    def recycle(self, window_num):
+        self.function_call_queue.put((window_num, 'recycle'))
+
     def evaluate_js(self, window_num, script):
-        self.function_call_queue.put((window_num, script))
+        # the lock keeps the buffer and the queue in the same order
+        with self._write_lock:
+            if self.shared_buffer is not None and len(script) >= self.shared_memory_threshold:
+                descriptor = self.shared_buffer.write(script)
+                if descriptor is not None:
+                    self.function_call_queue.put((window_num, descriptor))
+                    return
+            self.function_call_queue.put((window_num, script))
 
-    def exit(self):
-        if self.wv_process.is_alive():
-            self.wv_process.terminate()
-            self.wv_process.join()
-        self._reset()
+    def exit(self, router: MessageRouter = None):
+        """
+        Ends the webview process and resets the handler for the next one.
+        With a router, only does so if the handler still uses it, so that its 'exit' message resets the handler once.
+        """
+        with self._exit_lock:
+            if router is not None and router is not self.router:
+                return
+            router = self.router
+            if self.wv_process.is_alive():
+                self.wv_process.terminate()
+                self.wv_process.join()
+            self._reset()
+        router.close()
 
 
 class Chart(abstract.AbstractChart):
@@ -168,7 +433,7 @@ class Chart(abstract.AbstractChart):
         position: FLOAT = 'left'
     ):
         Chart.WV.debug = debug
-        self._i = Chart.WV.create_window(
+        self._i, self._token = Chart.WV.take_window(
                     width, height, x, y, screen, on_top, maximize, title
                 )
 
@@ -176,6 +441,7 @@ class Chart(abstract.AbstractChart):
                     script_func=lambda s: Chart.WV.evaluate_js(self._i, s),
                     js_api_code='pywebview.api.callback'
                 )
+        window.width = width
 
         abstract.Window._return_q = Chart.WV.return_queue
 
@@ -194,33 +460,42 @@ class Chart(abstract.AbstractChart):
         :param block: blocks execution until the chart is closed.
         """
         if not self.win.loaded:
-            Chart.WV.start()
+            if not Chart.WV.wv_process.is_alive():
+                Chart.WV.start()
             self.win.on_js_load()
-        else:
-            Chart.WV.show(self._i)
+        Chart.WV.show(self._i)
         if block:
             asyncio.run(self.show_async())
 
     async def show_async(self):
         self.show(block=False)
         try:
-            from lightweight_charts import polygon
-            [asyncio.create_task(self.polygon.async_set(*args)) for args in polygon._set_on_load]
-            while 1:
-                while Chart.WV.emit_queue.empty() and self.is_alive:
-                    await asyncio.sleep(0.05)
-                if not self.is_alive:
+            polygon = sys.modules.get('lightweight_charts.polygon')
+            if polygon is not None:
+                [asyncio.create_task(self.polygon.async_set(*args)) for args in polygon._set_on_load]
+            await self._handle_events()
+        except KeyboardInterrupt:
+            return
+
+    async def _handle_events(self):
+        messages = asyncio.Queue()
+        router = Chart.WV.router
+        router.subscribe(self._token, asyncio.get_running_loop(), messages)
+        try:
+            while self.is_alive:
+                response = await messages.get()
+                if response is None:    # exit() was called
                     return
-                response = Chart.WV.emit_queue.get()
-                if response == 'exit':
-                    Chart.WV.exit()
+                if response.startswith('_~_~CLOSED~_~_'):     # only this chart's window
                     self.is_alive = False
                     return
-                else:
-                    func, args = parse_event_message(self.win, response)
-                    await func(*args) if asyncio.iscoroutinefunction(func) else func(*args)
-        except KeyboardInterrupt:
-            return
+                if response == 'exit':  # the webview process has ended
+                    self.is_alive = False
+                    return
+                func, args = parse_event_message(self.win, response)
+                await func(*args) if asyncio.iscoroutinefunction(func) else func(*args)
+        finally:
+            router.unsubscribe(self._token)
 
     def hide(self):
         """
@@ -232,5 +507,18 @@ class Chart(abstract.AbstractChart):
         """
         Exits and destroys the chart window.\n
         """
-        Chart.WV.exit()
         self.is_alive = False
+        if Chart.WV.reuse_windows:
+            Chart.WV.recycle(self._i)
+            Chart.WV.router.wake(self._token)   # wakes up show_async, if it is running
+        else:
+            Chart.WV.exit()     # wakes up show_async with 'exit'
+
+    @classmethod
+    def prewarm(cls, width: int = 800, height: int = 600, reuse: bool = True):
+        """
+        Starts the webview process and loads a hidden chart page in the background,
+        which is taken over by the next `Chart` so that it shows without waiting for the page to load.\n
+        :param reuse: closed charts keep their window hidden and reset, for the next chart to reuse.
+        """
+        cls.WV.prewarm(width, height, reuse)
@@ -23,6 +23,7 @@ class Drawing(Pane):
         Irreversibly deletes the drawing.
         """
         self.run_script(f'{self.id}.detach()')
+        self._release_id()
 
     def options(self, color='#1E80F0', style='solid', width=4):
         self.run_script(f'''{self.id}.applyOptions({{
@@ -274,3 +275,4 @@ class VerticalSpan(Pane):
         Irreversibly deletes the vertical span.
         """
         self.run_script(f'{self._chart.id}.chart.removeSeries({self.id})')
+        self._release_id()
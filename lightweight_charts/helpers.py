@@ -1,7 +1,7 @@
 from ast import parse
-from .widgets import JupyterChart
+from concurrent.futures import ThreadPoolExecutor
 from .util import (
-    is_vbt_indicator, get_next_color
+    is_vbt_indicator, get_next_color, captured
 )
 import pandas as pd
 
@@ -62,6 +62,45 @@ def extend_kwargs(ohlcv, right, left, middle1, middle2, histogram, auto_scale, k
 
     return ohlcv #as tuple is immutable
 
+class OrderedCalls:
+    """
+    Defers chart calls until `flush`, which runs them in a thread pool and their scripts in submission order.
+    Calls on the same chart, or on series of that chart, run one after another, as they depend on each other
+    (eg. markers on the interval set by `set`, or the chart's `set` which also sets the lines named after its columns).
+    Without an executor, calls are run straight away.
+    """
+    def __init__(self, executor: ThreadPoolExecutor = None):
+        self.executor = executor
+        self.pending = []
+
+    def submit(self, target, func, *args, **kwargs):
+        if self.executor is None:
+            return func(*args, **kwargs)
+        self.pending.append((target, func, args, kwargs))
+
+    def flush(self, run_script):
+        pending, self.pending = self.pending, []
+        groups = {}
+        for index, (target, *_) in enumerate(pending):
+            groups.setdefault(id(getattr(target, '_chart', target)), []).append(index)
+
+        def run_group(indices):
+            results = []
+            for index in indices:
+                _, func, args, kwargs = pending[index]
+                results.append(captured(func, *args, **kwargs))
+            return results
+
+        scripts = [None] * len(pending)
+        futures = [(indices, self.executor.submit(run_group, indices)) for indices in groups.values()]
+        for indices, future in futures:
+            for index, captured_scripts in zip(indices, future.result()):
+                scripts[index] = captured_scripts
+        for captured_scripts in scripts:
+            for script, run_last in captured_scripts:
+                run_script(script, run_last)
+
+
 # Register the custom accessor
 @pd.api.extensions.register_series_accessor("lw")
 class PlotSRAccessor:
@@ -318,7 +357,7 @@ class Panel:
     def chart(self, **kwargs):
         chart([self], **kwargs)
     
-def chart(panes: list[Panel], sync=False, title='', size="s", xloc=None, session = slice("09:30:00","9:30:05"), precision=None, params_detail=False, **kwargs):
+def chart(panes: list[Panel], sync=False, title='', size="s", xloc=None, session = slice("09:30:00","9:30:05"), precision=None, params_detail=False, workers=None, downsample=False, **kwargs):
     """
     Function to fast render a chart with multiple panes. This function manipulates graphical
     output or interfaces with an external framework to display charts with synchronized
@@ -346,6 +385,13 @@ def chart(panes: list[Panel], sync=False, title='', size="s", xloc=None, session
 
         * params_detail (bool): If True displays in the legend full names of multiindex columns.
 
+        * workers (int): Number of threads used to slice, format and serialize the series of all panes.
+                        Scripts are still emitted in the order of the panes. Defaults to None (sequential).
+
+        * downsample (bool): If True, sends about one point per pixel of the chart width: lines are reduced by LTTB,
+                        histograms keep their min/max envelope and candles are aggregated. The full data is kept
+                        and can be resent in detail for a time range with `refine`. Defaults to False.
+
         * xloc (str): xloc advanced filtering of vbt.xloc accessor. Defaults to None. Applies to all panes.
         Might be overriden by pane-specific xloc.
             
@@ -393,12 +439,21 @@ def chart(panes: list[Panel], sync=False, title='', size="s", xloc=None, session
 
     """
 
+    # imported here, widgets pulls in the optional GUI and notebook frameworks
+    from .widgets import JupyterChart
+
     def xloc_me(dfsr, xloc):
           if xloc is None:
                 return dfsr
           else:
                 return dfsr.vbt.xloc[xloc].obj
 
+    def set_sliced(target, dfsr, xloc):
+          target.set(xloc_me(dfsr, xloc))
+
+    executor = ThreadPoolExecutor(workers) if workers else None
+    calls = OrderedCalls(executor)
+    pane_tails = []
     size_to_dimensions = {
             'xs': (600, 200),
             's': (800, 400),
@@ -416,6 +471,8 @@ def chart(panes: list[Panel], sync=False, title='', size="s", xloc=None, session
             else:
                     subchartX = chartX.create_subchart(position='right', width=1, height=height_ratio, sync=sync, leftScale=bool(pane.left))
                     active_chart = subchartX
+            if downsample:
+                    active_chart.downsample()
 
             xloc = pane.xloc if pane.xloc is not None else xloc
 
@@ -425,11 +482,11 @@ def chart(panes: list[Panel], sync=False, title='', size="s", xloc=None, session
                         for markerset in markers:
                             if isinstance(markerset, tuple):
                                   markerset,color = markerset
-                            active_chart.markers_set(markers=xloc_me(markerset, xloc), type=type, color=color if color is not None else None)
+                            calls.submit(active_chart, active_chart.markers_set, markers=xloc_me(markerset, xloc), type=type, color=color if color is not None else None)
                 else:
                     if isinstance(markers, tuple):
                         markers,color = markers
-                    active_chart.markers_set(markers=xloc_me(markers, xloc), type=type, color=color if color is not None else None)                  
+                    calls.submit(active_chart, active_chart.markers_set, markers=xloc_me(markers, xloc), type=type, color=color if color is not None else None)                  
 
 
             def add_to_scale(series, right, histogram, left, middle1, middle2, column,name = None):
@@ -509,7 +566,7 @@ def chart(panes: list[Panel], sync=False, title='', size="s", xloc=None, session
                     series, entries, exits, markers = (pane.ohlcv + (None,) * 4)[:4]
                     if series is None:
                           raise ValueError("OHLCV series cannot be None. Omit the OHLCV tuple.")
-                    active_chart.set(xloc_me(series, xloc))
+                    calls.submit(active_chart, set_sliced, active_chart, series, xloc)
                     if entries is not None:
                         display_markers(active_chart=active_chart, markers=entries, type="entries", xloc=xloc)
                     if exits is not None:
@@ -531,15 +588,15 @@ def chart(panes: list[Panel], sync=False, title='', size="s", xloc=None, session
                         for col_tuple in series.columns:
                             kwargs = {'name': name + str(col_tuple)}
                             tmp = active_chart.create_histogram(**kwargs) #green transparent "rgba(53, 94, 59, 0.6)"
-                            tmp.set(xloc_me(series.loc[:, col_tuple], xloc))
+                            calls.submit(tmp, set_sliced, tmp, series.loc[:, col_tuple], xloc)
                     elif isinstance(series, pd.DataFrame): #it df with multiple columns (probably symbols)
                         for col in series.columns:
                             kwargs = {'name': name + str(col)}
                             tmp = active_chart.create_histogram(**kwargs) #green transparent "rgba(53, 94, 59, 0.6)"
-                            tmp.set(xloc_me(series[col], xloc))                      
+                            calls.submit(tmp, set_sliced, tmp, series[col], xloc)                      
                     else:
                         tmp = active_chart.create_histogram(**kwargs) #green transparent "rgba(53, 94, 59, 0.6)"
-                        tmp.set(xloc_me(series, xloc))
+                        calls.submit(tmp, set_sliced, tmp, series, xloc)
 
             if pane.title is not None:
                     active_chart.topbar.textbox("title",pane.title)
@@ -551,9 +608,11 @@ def chart(panes: list[Panel], sync=False, title='', size="s", xloc=None, session
                             continue
                     for tup in att_value_tuple:
                             series, name, entries, exits, markers = (tup + (None, None, None, None, None))[:5]
-                            if series is None:
+                            #a frame without value columns has no lines to draw
+                            if series is None or (isinstance(series, pd.DataFrame) and series.columns.empty):
                                 continue
 
+                            tmp = None
                             #pokud jde o vbt indikator vytahneme vsechny output a predpokladame, ze jde o lines a vykreslime je
                             if is_vbt_indicator(series):
                                 series = series.xloc[xloc] if xloc is not None else series
@@ -561,20 +620,19 @@ def chart(panes: list[Panel], sync=False, title='', size="s", xloc=None, session
                                     output_series = getattr(series, output)
                                     output = name + ':' + output if name is not None else series.short_name + ":" + output  
                                     #if output_series is multiindex - create aline for each combination
-                                    if isinstance(output_series, pd.DataFrame) and isinstance(output_series.columns, pd.MultiIndex):
-                                        for col_tuple in output_series.columns:
-
-                                            tmp = active_chart.create_line(name=output + " " + str(col_tuple), priceScaleId=att_name)#, color="blue")
-                                            tmp.set(output_series.loc[:, col_tuple])
-                                    elif isinstance(output_series, pd.DataFrame): #it df with multiple columns (probably symbols)
-                                        for col in output_series.columns:
-                                            tmp = active_chart.create_line(name=output + " " + str(col), priceScaleId=att_name)#, color="blue")
-                                            tmp.set(output_series[col])                            
+                                    #all columns share the time axis, which is sent once
+                                    if isinstance(output_series, pd.DataFrame):
+                                        if output_series.columns.empty:
+                                            continue
+                                        lines = [active_chart.create_line(name=output + " " + str(col), priceScaleId=att_name) for col in output_series.columns]
+                                        calls.submit(active_chart, active_chart.set_lines, output_series, lines=lines)
+                                        tmp = lines[-1]
                                     else:  
                                         tmp = active_chart.create_line(name=output, priceScaleId=att_name)#, color="blue")
-                                        tmp.set(output_series)
+                                        calls.submit(tmp, tmp.set, output_series)
                             #if multiindex then unpack them all with tuple as names
                             elif isinstance(series, pd.DataFrame) and isinstance(series.columns, pd.MultiIndex):
+                                final_names = []
                                 for col_tuple in series.columns:
                                     #if required show all multiindex names
                                     if params_detail:   
@@ -583,11 +641,13 @@ def chart(panes: list[Panel], sync=False, title='', size="s", xloc=None, session
                                         # Build the name string by combining level names and their corresponding values
                                         col_name_str = " ".join([f"{index_names[i]}: {col_val}" for i, col_val in enumerate(col_tuple)])
                                         # Use this name in the chart, adding the provided name if it exists
-                                        final_name = col_name_str if name is None else f"{name} {col_name_str}"
+                                        final_names.append(col_name_str if name is None else f"{name} {col_name_str}")
                                     else:
-                                        final_name = str(col_tuple) if name is None else name+" "+str(col_tuple)
-                                    tmp = active_chart.create_line(name=final_name, priceScaleId=att_name)#, color="blue")
-                                    tmp.set(xloc_me(series.loc[:, col_tuple], xloc))
+                                        final_names.append(str(col_tuple) if name is None else name+" "+str(col_tuple))
+                                #all columns share the time axis, which is sent once
+                                lines = [active_chart.create_line(name=final_name, priceScaleId=att_name) for final_name in final_names]
+                                calls.submit(active_chart, active_chart.set_lines, xloc_me(series, xloc), lines=lines)
+                                tmp = lines[-1]
                             elif isinstance(series, pd.DataFrame): #it df with multiple columns (probably symbols)
                                 
                         #recursive df handling - but make sure it
@@ -606,7 +666,7 @@ def chart(panes: list[Panel], sync=False, title='', size="s", xloc=None, session
 
                                         # Now call the `active_chart.create_line()` as per your requirement
                                         tmp = active_chart.create_line(name=result_name, priceScaleId=att_name)
-                                        tmp.set(xloc_me(result_series, xloc))  # Call the xloc_me function for setting xloc
+                                        calls.submit(tmp, set_sliced, tmp, result_series, xloc)  # sliced by xloc_me
 
                                     else:
                                         raise ValueError(f"Unexpected type {type(series)} encountered")
@@ -626,10 +686,12 @@ def chart(panes: list[Panel], sync=False, title='', size="s", xloc=None, session
                                       name = "no_name" if not hasattr(series, 'name') or series.name is None else str(series.name)
 
                                 tmp = active_chart.create_line(name=name, priceScaleId=att_name)#, color="blue")
-                                tmp.set(xloc_me(series, xloc))
+                                calls.submit(tmp, set_sliced, tmp, series, xloc)
 
+                            if tmp is None:
+                                continue
                             if pane.precision is not None or precision is not None:
-                                  tmp.precision(pane.precision if pane.precision is not None else precision)
+                                  calls.submit(tmp, tmp.precision, pane.precision if pane.precision is not None else precision)
 
                             if entries is not None:
                                 display_markers(active_chart=tmp, markers=entries, type="entries", xloc=xloc)
@@ -638,12 +700,27 @@ def chart(panes: list[Panel], sync=False, title='', size="s", xloc=None, session
                             if markers is not None:
                                 display_markers(active_chart=tmp, markers=markers, xloc=xloc)
             
-            active_chart.legend(True)
-            active_chart.fit()
+            last_used_series = None
             if session is not None and session:
                 try:
-                    last_used_series = output_series.loc[:, col_tuple] if isinstance(output_series, pd.DataFrame) and isinstance(output_series.columns, pd.MultiIndex) else output_series if is_vbt_indicator(series) else series #pokud byl posledni series vbt, pak pouzijeme jeho outputy
+                    last_used_series = output_series.iloc[:, -1] if isinstance(output_series, pd.DataFrame) and isinstance(output_series.columns, pd.MultiIndex) else output_series if is_vbt_indicator(series) else series #pokud byl posledni series vbt, pak pouzijeme jeho outputy
                     last_used_series = last_used_series.iloc[:,0] if isinstance(last_used_series, pd.DataFrame) else last_used_series #if df then use just first column
+                except Exception as e:
+                    print("Error fetching main session")
+            pane_tails.append((active_chart, last_used_series, xloc))
+
+    # pane scripts are emitted in pane order, before the legend, fit and session spans
+    try:
+        calls.flush(chartX.run_script)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    for active_chart, last_used_series, xloc in pane_tails:
+            active_chart.legend(True)
+            active_chart.fit()
+            if last_used_series is not None:
+                try:
                     t1 = xloc_me(last_used_series, xloc)
                     t1 = t1.vbt.xloc[session]
                     target_data = t1.obj
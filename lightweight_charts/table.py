@@ -40,7 +40,7 @@ class Row(dict):
         original_value = value
         if column in self._table._formatters:
             value = self._table._formatters[column].replace(self._table.VALUE, str(value))
-        self.run_script(f'{self._table.id}.updateCell("{self.id}", "{column}", "{value}")')
+        self._table.win.dispatch(('call', self._table.id, 'updateCell', self.id, column, str(value)))
         return super().__setitem__(column, original_value)
 
     def background_color(self, column, color): self._style('backgroundColor', column, color)
@@ -48,7 +48,7 @@ class Row(dict):
     def text_color(self, column, color): self._style('textColor', column, color)
 
     def _style(self, style, column, arg):
-        self.run_script(f"{self._table.id}.styleCell({self.id}, '{column}', '{style}', '{arg}')")
+        self._table.win.dispatch(('call', self._table.id, 'styleCell', self.id, column, style, arg))
 
     def delete(self):
         self.run_script(f"{self._table.id}.deleteRow('{self.id}')")
@@ -128,7 +128,7 @@ class Table(Pane, dict):
 
     def format(self, column: str, format_str: str): self._formatters[column] = format_str
 
-    def resize(self, width: NUM, height: NUM): self.run_script(f'{self.id}.reSize({width}, {height})')
+    def resize(self, width: NUM, height: NUM): self.win.dispatch(('call', self.id, 'reSize', width, height))
 
     def visible(self, visible: bool):
         self.is_shown = visible
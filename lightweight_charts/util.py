@@ -1,12 +1,21 @@
 import asyncio
+import bisect
+import functools
+import inspect
+import itertools
 import orjson
+from base64 import b64encode
+from collections.abc import AsyncIterator, Iterator
+from concurrent.futures import Future
 from datetime import datetime
-from random import choices
-from typing import Literal, Union
+from typing import Callable, Literal, Optional, Union
 from numpy import isin
+import numpy as np
 import pandas as pd
 import re
-from matplotlib.colors import to_rgba
+import threading
+import time
+import weakref
 
 # # Predefined colors that stand out well on dark backgrounds
 # COLORS = [
@@ -74,6 +83,60 @@ def hex_to_rgba(hex_color, alpha=0.5):
     r, g, b = int(hex_color[0:2], 16), int(hex_color[2:4], 16), int(hex_color[4:6], 16)
     return f'rgba({r}, {g}, {b}, {alpha})'
 
+# CSS named colors, as hex
+CSS_COLORS = {
+    'aliceblue': 'f0f8ff', 'antiquewhite': 'faebd7', 'aqua': '00ffff', 'aquamarine': '7fffd4',
+    'azure': 'f0ffff', 'beige': 'f5f5dc', 'bisque': 'ffe4c4', 'black': '000000', 'blanchedalmond': 'ffebcd',
+    'blue': '0000ff', 'blueviolet': '8a2be2', 'brown': 'a52a2a', 'burlywood': 'deb887',
+    'cadetblue': '5f9ea0', 'chartreuse': '7fff00', 'chocolate': 'd2691e', 'coral': 'ff7f50',
+    'cornflowerblue': '6495ed', 'cornsilk': 'fff8dc', 'crimson': 'dc143c', 'cyan': '00ffff',
+    'darkblue': '00008b', 'darkcyan': '008b8b', 'darkgoldenrod': 'b8860b', 'darkgray': 'a9a9a9',
+    'darkgreen': '006400', 'darkgrey': 'a9a9a9', 'darkkhaki': 'bdb76b', 'darkmagenta': '8b008b',
+    'darkolivegreen': '556b2f', 'darkorange': 'ff8c00', 'darkorchid': '9932cc', 'darkred': '8b0000',
+    'darksalmon': 'e9967a', 'darkseagreen': '8fbc8f', 'darkslateblue': '483d8b', 'darkslategray': '2f4f4f',
+    'darkslategrey': '2f4f4f', 'darkturquoise': '00ced1', 'darkviolet': '9400d3', 'deeppink': 'ff1493',
+    'deepskyblue': '00bfff', 'dimgray': '696969', 'dimgrey': '696969', 'dodgerblue': '1e90ff',
+    'firebrick': 'b22222', 'floralwhite': 'fffaf0', 'forestgreen': '228b22', 'fuchsia': 'ff00ff',
+    'gainsboro': 'dcdcdc', 'ghostwhite': 'f8f8ff', 'gold': 'ffd700', 'goldenrod': 'daa520', 'gray': '808080',
+    'green': '008000', 'greenyellow': 'adff2f', 'grey': '808080', 'honeydew': 'f0fff0', 'hotpink': 'ff69b4',
+    'indianred': 'cd5c5c', 'indigo': '4b0082', 'ivory': 'fffff0', 'khaki': 'f0e68c', 'lavender': 'e6e6fa',
+    'lavenderblush': 'fff0f5', 'lawngreen': '7cfc00', 'lemonchiffon': 'fffacd', 'lightblue': 'add8e6',
+    'lightcoral': 'f08080', 'lightcyan': 'e0ffff', 'lightgoldenrodyellow': 'fafad2', 'lightgray': 'd3d3d3',
+    'lightgreen': '90ee90', 'lightgrey': 'd3d3d3', 'lightpink': 'ffb6c1', 'lightsalmon': 'ffa07a',
+    'lightseagreen': '20b2aa', 'lightskyblue': '87cefa', 'lightslategray': '778899',
+    'lightslategrey': '778899', 'lightsteelblue': 'b0c4de', 'lightyellow': 'ffffe0', 'lime': '00ff00',
+    'limegreen': '32cd32', 'linen': 'faf0e6', 'magenta': 'ff00ff', 'maroon': '800000',
+    'mediumaquamarine': '66cdaa', 'mediumblue': '0000cd', 'mediumorchid': 'ba55d3', 'mediumpurple': '9370db',
+    'mediumseagreen': '3cb371', 'mediumslateblue': '7b68ee', 'mediumspringgreen': '00fa9a',
+    'mediumturquoise': '48d1cc', 'mediumvioletred': 'c71585', 'midnightblue': '191970',
+    'mintcream': 'f5fffa', 'mistyrose': 'ffe4e1', 'moccasin': 'ffe4b5', 'navajowhite': 'ffdead',
+    'navy': '000080', 'oldlace': 'fdf5e6', 'olive': '808000', 'olivedrab': '6b8e23', 'orange': 'ffa500',
+    'orangered': 'ff4500', 'orchid': 'da70d6', 'palegoldenrod': 'eee8aa', 'palegreen': '98fb98',
+    'paleturquoise': 'afeeee', 'palevioletred': 'db7093', 'papayawhip': 'ffefd5', 'peachpuff': 'ffdab9',
+    'peru': 'cd853f', 'pink': 'ffc0cb', 'plum': 'dda0dd', 'powderblue': 'b0e0e6', 'purple': '800080',
+    'rebeccapurple': '663399', 'red': 'ff0000', 'rosybrown': 'bc8f8f', 'royalblue': '4169e1',
+    'saddlebrown': '8b4513', 'salmon': 'fa8072', 'sandybrown': 'f4a460', 'seagreen': '2e8b57',
+    'seashell': 'fff5ee', 'sienna': 'a0522d', 'silver': 'c0c0c0', 'skyblue': '87ceeb', 'slateblue': '6a5acd',
+    'slategray': '708090', 'slategrey': '708090', 'snow': 'fffafa', 'springgreen': '00ff7f',
+    'steelblue': '4682b4', 'tan': 'd2b48c', 'teal': '008080', 'thistle': 'd8bfd8', 'tomato': 'ff6347',
+    'turquoise': '40e0d0', 'violet': 'ee82ee', 'wheat': 'f5deb3', 'white': 'ffffff', 'whitesmoke': 'f5f5f5',
+    'yellow': 'ffff00', 'yellowgreen': '9acd32',
+}
+
+
+def color_to_rgb(color: str) -> tuple:
+    """
+    Parses a CSS named color or a hex color (#rgb, #rgba, #rrggbb or #rrggbbaa) into (r, g, b) integers.
+    """
+    hex_color = CSS_COLORS.get(color.lower())
+    if hex_color is None:
+        hex_color = color.lstrip('#')
+        if len(hex_color) in (3, 4):
+            hex_color = ''.join(c * 2 for c in hex_color)
+        if len(hex_color) not in (6, 8) or not re.fullmatch(r'[0-9a-fA-F]+', hex_color):
+            raise ValueError(f'Invalid color "{color}".')
+    return int(hex_color[0:2], 16), int(hex_color[2:4], 16), int(hex_color[4:6], 16)
+
 def apply_opacity(color, opacity):
     """
     Converts any color format (named, hex, RGB, or RGBA) to RGBA format and applies a specified opacity.
@@ -103,9 +166,8 @@ def apply_opacity(color, opacity):
         # Apply the new opacity by multiplying with the current opacity if it exists
         final_opacity = current_opacity * opacity
     else:
-        # Color is a named color or hex; convert it using matplotlib
-        rgba = to_rgba(color)
-        r, g, b, _ = [int(255 * x) for x in rgba]
+        # Color is a named color or hex
+        r, g, b = color_to_rgb(color)
         final_opacity = opacity  # Directly use the given opacity
     return f"rgba({r}, {g}, {b}, {final_opacity})"
 
@@ -125,16 +187,370 @@ class Pane:
             return
         self.id = Window._id_gen.generate()
 
+    def _release_id(self):
+        # called once the JS object is gone, so its name can be reused
+        self.win.handlers.pop(self.id, None)
+        self.win._id_gen.release(self.id)
+
+
+class IDGen:
+    """
+    Allocates the names of the JS objects created by the library.
+    Names come from a counter; names given back through `release` are reused first.
+    """
+    prefix = 'window._lwc'
+
+    def __init__(self):
+        self._next = 0
+        self._free = []
+        self._used = set()
 
-class IDGen(list):
-    ascii = 'abcdefghijklmnopqrstuvwxyz'
+    def __contains__(self, var: str):
+        return var in self._used
+
+    def __len__(self):
+        return len(self._used)
 
     def generate(self) -> str:
-        var = ''.join(choices(self.ascii, k=8))
-        if var not in self:
-            self.append(var)
-            return f'window.{var}'
-        self.generate()
+        if self._free:
+            var = self._free.pop()
+        else:
+            var = f'{self.prefix}{self._next}'
+            self._next += 1
+        self._used.add(var)
+        return var
+
+    def release(self, var: str):
+        if var in self._used:
+            self._used.remove(var)
+            self._free.append(var)
+
+
+NAT = np.iinfo(np.int64).min
+UNITS_PER_SECOND = {'s': 1, 'ms': 10 ** 3, 'us': 10 ** 6, 'ns': 10 ** 9}
+
+
+def datetime_ns(values) -> np.ndarray:
+    """
+    Returns datetime-like values as int64 nanoseconds since the epoch (UTC),
+    without copying when they are already stored in nanoseconds.
+    """
+    index = values if isinstance(values, pd.DatetimeIndex) else pd.DatetimeIndex(values)
+    factor = _ns_factor(index)
+    if factor == 1:
+        return index.asi8
+    ns = index.asi8 * factor
+    ns[index.asi8 == NAT] = NAT
+    return ns
+
+
+def datetime_seconds(values) -> np.ndarray:
+    """
+    Converts datetime-like values into float seconds since the epoch, allocating only the result.
+    """
+    if not pd.api.types.is_datetime64_any_dtype(values):
+        values = pd.to_datetime(values)
+    index = values if isinstance(values, pd.DatetimeIndex) else pd.DatetimeIndex(values)
+    return index.asi8 / UNITS_PER_SECOND[getattr(index, 'unit', 'ns')]
+
+
+def _ns_factor(index: pd.DatetimeIndex) -> int:
+    return 10 ** 9 // UNITS_PER_SECOND[getattr(index, 'unit', 'ns')]
+
+
+INTERVAL_SAMPLE = 10_000
+_interval_cache = {}
+
+
+def _mode(values: np.ndarray):
+    uniques, counts = np.unique(values, return_counts=True)
+    return uniques[counts.argmax()]
+
+
+def _infer_interval(times: pd.DatetimeIndex, sample: int):
+    raw = times.asi8
+    step = max(1, (len(raw) - 1) // sample)
+    positions = np.arange(0, len(raw) - 1, step)
+    start, end = raw[positions], raw[positions + 1]
+    diffs = (end - start)[(start != NAT) & (end != NAT)]
+    if not len(diffs):
+        return None
+    interval = _mode(diffs) * _ns_factor(times) / 10 ** 9
+
+    # the offset is derived from wall time, as with the `.dt` accessors
+    sampled = times[::max(1, len(times) // sample)].dropna()
+    if sampled.tz is not None:
+        sampled = sampled.tz_localize(None)
+    ns = datetime_ns(sampled)
+    dates = ns.astype('M8[ns]')
+    days = (dates.astype('M8[D]') - dates.astype('M8[M]')).astype(np.int64) + 1
+    units = (
+        _mode((ns // 1_000) % 1_000_000) / 1_000_000,
+        _mode((ns // 10 ** 9) % 60),
+        _mode((ns // (60 * 10 ** 9)) % 60) * 60,
+        _mode((ns // (3600 * 10 ** 9)) % 24) * 3600,
+        _mode(days) * 86400,
+    )
+    offset = 0
+    for value in units:
+        if value == 0:
+            continue
+        elif value >= interval:
+            break
+        offset = value
+        break
+    return float(interval), float(offset)
+
+
+def infer_interval(times, index: Optional[pd.Index] = None, sample: int = INTERVAL_SAMPLE):
+    """
+    Infers the bar interval and its offset (both in seconds) from datetime values,
+    using the most common difference between consecutive times and the most common
+    time components, computed on at most `sample` values.
+
+    If `index` is the DatetimeIndex the times were taken from, the result is cached
+    for as long as that index is alive, so frames sharing an index pay the cost once.
+    Returns None if there are fewer than two valid times.
+    """
+    times = times if isinstance(times, pd.DatetimeIndex) else pd.DatetimeIndex(times)
+    if not (isinstance(index, pd.DatetimeIndex) and len(index) == len(times)
+            and _ns_factor(index) == _ns_factor(times) and np.array_equal(times.asi8, index.asi8)):
+        return _infer_interval(times, sample)
+    key = id(index)
+    if key not in _interval_cache:
+        _interval_cache[key] = (
+            weakref.ref(index, lambda _: _interval_cache.pop(key, None)),
+            _infer_interval(times, sample)
+        )
+    return _interval_cache[key][1]
+
+
+class BarStore:
+    """
+    Append-only storage of bars, backed by one numpy array per column.
+
+    Capacity grows geometrically at either end, so `append`, `extend` and `prepend` are amortised O(1)
+    per bar; `frame` returns a DataFrame view of the stored rows, cached until the next write.
+    """
+    MIN_CAPACITY = 64
+
+    def __init__(self, df: Optional[pd.DataFrame] = None):
+        df = pd.DataFrame() if df is None else df
+        self._index = df.index
+        self._columns = {name: df[name].to_numpy() for name in df.columns}
+        self._start = 0     # position of the first row in the arrays
+        self._length = len(df)
+        self._capacity = self._length
+        # the arrays may reference the caller's frame until the first write
+        self._owned = False
+        self._frame = df
+
+    @classmethod
+    def from_columns(cls, columns: dict) -> 'BarStore':
+        """Adopts arrays of equal length without building a DataFrame until `frame` is called."""
+        store = cls()
+        store._columns = dict(columns)
+        store._length = store._capacity = len(next(iter(columns.values()), ()))
+        store._index = pd.RangeIndex(store._length)
+        store._frame = None
+        return store
+
+    def __len__(self):
+        return self._length
+
+    def _reserve(self, size: int, front: int = 0):
+        # adopted arrays are copied before the first write, owned ones grow geometrically
+        if self._owned and front <= self._start and self._start + size <= self._capacity:
+            return
+        if front > self._start:
+            front = max(front, self._length, self.MIN_CAPACITY)
+        else:
+            front = self._start if self._owned else 0
+        back = self._capacity - self._start
+        if size > back:
+            back = max(size, back * 2, self.MIN_CAPACITY)
+        for name, array in self._columns.items():
+            grown = np.empty(front + back, dtype=array.dtype)
+            grown[front:front + self._length] = array[self._start:self._start + self._length]
+            self._columns[name] = grown
+        self._start, self._capacity = front, front + back
+        self._owned = True
+
+    def _column(self, name: str, dtype: np.dtype) -> np.ndarray:
+        array = self._columns.get(name)
+        if array is None:
+            array = self._columns[name] = np.full(self._capacity, np.nan)
+        if array.dtype != object and not np.can_cast(dtype, array.dtype, 'same_kind'):
+            try:
+                target = np.result_type(array.dtype, dtype)
+            except TypeError:
+                target = np.dtype(object)
+            array = self._columns[name] = array.astype(object if target.kind in 'USV' else target)
+        return array
+
+    def _write(self, position: int, row: pd.Series):
+        position += self._start
+        for name, value in row.items():
+            if value is None:
+                value = np.nan
+            self._column(name, np.asarray(value).dtype)[position] = value
+        for name in self._columns.keys() - set(row.index):
+            self._column(name, np.dtype(float))[position] = np.nan
+        self._frame = None
+
+    def _write_block(self, position: int, df: pd.DataFrame):
+        position += self._start
+        for name, col in df.items():
+            values = col.to_numpy()
+            self._column(name, values.dtype)[position:position + len(df)] = values
+        for name in self._columns.keys() - set(df.columns):
+            self._column(name, np.dtype(float))[position:position + len(df)] = np.nan
+        self._frame = None
+
+    def append(self, row: pd.Series):
+        self._reserve(self._length + 1)
+        self._length += 1
+        self._write(self._length - 1, row)
+
+    def extend(self, df: pd.DataFrame):
+        """Appends the rows of a frame."""
+        if not len(df):
+            return
+        self._reserve(self._length + len(df))
+        self._length += len(df)
+        self._write_block(self._length - len(df), df)
+
+    def prepend(self, df: pd.DataFrame):
+        """Inserts the rows of a frame before the stored rows."""
+        if not len(df):
+            return
+        self._reserve(self._length, front=len(df))
+        self._start -= len(df)
+        self._length += len(df)
+        self._index = pd.RangeIndex(0)
+        self._write_block(0, df)
+
+    def replace_last(self, row: pd.Series):
+        """Overwrites the last stored row."""
+        if not self._length:
+            return
+        self._reserve(self._length)
+        self._write(self._length - 1, row)
+
+    def column(self, name: str) -> np.ndarray:
+        """Returns a view of the stored values of a column."""
+        return self._columns[name][self._start:self._start + self._length]
+
+    def tail(self, count: int) -> pd.DataFrame:
+        """Returns the last `count` rows as a new frame, without building the whole frame."""
+        end = self._start + self._length
+        start = end - min(count, self._length)
+        return pd.DataFrame({name: array[start:end] for name, array in self._columns.items()})
+
+    def frame(self) -> pd.DataFrame:
+        if self._frame is None:
+            index = self._index if len(self._index) == self._length else pd.RangeIndex(self._length)
+            self._frame = pd.DataFrame(
+                {name: array[self._start:self._start + self._length] for name, array in self._columns.items()},
+                index=index, copy=False
+            )
+        return self._frame
+
+
+class MarkerStore:
+    """
+    Markers of a series, held as numpy arrays sorted by time.
+
+    Position, shape, color and text are stored as codes into lookup tables,
+    so bulk adds and removals never build a dict per marker.
+    """
+    FIELDS = ('position', 'color', 'shape', 'text')
+
+    def __init__(self):
+        self._next_id = 0
+        self.ids = np.empty(0, dtype=np.int64)
+        self.time = np.empty(0, dtype=np.float64)
+        self.codes = {field: np.empty(0, dtype=np.int32) for field in self.FIELDS}
+        self.tables = {field: [] for field in self.FIELDS}
+        self._lookup = {field: {} for field in self.FIELDS}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _encode(self, field: str, values, length: int) -> np.ndarray:
+        lookup, table = self._lookup[field], self.tables[field]
+        if np.ndim(values) == 0:
+            values = [values]
+        codes = np.empty(len(values), dtype=np.int32)
+        for i, value in enumerate(values):
+            code = lookup.get(value)
+            if code is None:
+                code = lookup[value] = len(table)
+                table.append(value)
+            codes[i] = code
+        return np.broadcast_to(codes, length) if len(codes) == 1 else codes
+
+    def add(self, time, position: str, shape: str, color: str, text: str = '') -> np.ndarray:
+        """
+        Adds markers at the given times, merging them into the sorted arrays.
+        The other fields may be given per marker or once for all of them.
+        :return: the ids of the new markers, in the order given.
+        """
+        time = np.atleast_1d(np.asarray(time, dtype=np.float64))
+        ids = np.arange(self._next_id, self._next_id + len(time), dtype=np.int64)
+        self._next_id += len(time)
+        codes = {
+            field: self._encode(field, value, len(time))
+            for field, value in zip(self.FIELDS, (position, color, shape, text))
+        }
+        order = np.argsort(time, kind='stable')
+        # markers already present at the same time stay in front of the new ones
+        at = np.searchsorted(self.time, time[order], side='right')
+        self.ids = np.insert(self.ids, at, ids[order])
+        self.time = np.insert(self.time, at, time[order])
+        for field in self.FIELDS:
+            self.codes[field] = np.insert(self.codes[field], at, codes[field][order])
+        return ids
+
+    def remove(self, ids) -> int:
+        """
+        Removes the markers with the given ids, returning how many were found.
+        """
+        keep = ~np.isin(self.ids, np.asarray(ids, dtype=np.int64))
+        removed = len(keep) - int(keep.sum())
+        self.ids = self.ids[keep]
+        self.time = self.time[keep]
+        for field in self.FIELDS:
+            self.codes[field] = self.codes[field][keep]
+        return removed
+
+    def clear(self):
+        self.ids = self.ids[:0]
+        self.time = self.time[:0]
+        for field in self.FIELDS:
+            self.codes[field] = self.codes[field][:0]
+
+    def to_dict(self) -> dict:
+        return {
+            int(marker_id): {
+                'time': float(self.time[i]),
+                **{field: self.tables[field][self.codes[field][i]] for field in self.FIELDS}
+            }
+            for i, marker_id in enumerate(self.ids)
+        }
+
+    def js(self, ids=None) -> str:
+        """
+        Serializes the markers, or only those with the given ids, into a list of records.
+        """
+        rows = slice(None) if ids is None else np.isin(self.ids, np.asarray(ids, dtype=np.int64))
+        columns, lookups = {'id': self.ids[rows], 'time': self.time[rows]}, {}
+        for field in self.FIELDS:
+            # only send the part of the lookup table these rows use
+            used, columns[field] = np.unique(self.codes[field][rows], return_inverse=True)
+            lookups[field] = [self.tables[field][code] for code in used]
+        payload = orjson.dumps(columns, option=orjson.OPT_SERIALIZE_NUMPY).decode('utf-8')
+        return f'Lib.zipColumns({payload}, {orjson.dumps(lookups).decode("utf-8")})'
 
 
 def parse_event_message(window, string):
@@ -144,6 +560,162 @@ def parse_event_message(window, string):
     return func, args
 
 
+_capture = threading.local()
+
+
+def captured(func: Callable, *args, **kwargs) -> list:
+    """
+    Calls `func` and returns the `(script, run_last)` pairs it ran in this thread, without running them.
+    Lets chart calls be prepared in worker threads, and their scripts run in order later.
+    """
+    _capture.scripts = scripts = []
+    try:
+        func(*args, **kwargs)
+    finally:
+        _capture.scripts = None
+    return scripts
+
+
+def capture_script(script: str, run_last: bool = False) -> bool:
+    scripts = getattr(_capture, 'scripts', None)
+    if scripts is None:
+        return False
+    scripts.append((script, run_last))
+    return True
+
+
+class Profiler:
+    """
+    Records the duration and payload size of each stage of the Python to JavaScript pipeline,
+    aggregated per profiled method (`set`, `update`, `markers_set`, `create_line`...).
+
+    Stages: `total` (the whole method), `format` (datetime formatting), `downsample` (reducing the
+    points sent), `serialize` (`js_data`, `js_columnar`), `send` (handing the script to the window,
+    including the queue transfer) and, with `round_trip`, `evaluate` (until the webview has evaluated the scripts).
+    Scripts sent outside a profiled method, such as a batch flushed later, are recorded under `background`.
+    """
+    # upper edges of the histogram buckets, in seconds
+    BUCKETS = (0.0001, 0.001, 0.01, 0.1, 1.0)
+    _local = threading.local()
+
+    def __init__(self, window=None, round_trip: bool = False):
+        self.window = window
+        self.round_trip = round_trip
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self.window is not None and self.window.profiler is self:
+            self.window.profiler = None
+
+    def record(self, method: str, stage: str, seconds: float, nbytes: int = 0):
+        with self._lock:
+            entry = self._stages.get((method, stage))
+            if entry is None:
+                entry = self._stages[(method, stage)] = [0, 0.0, 0.0, 0, [0] * (len(self.BUCKETS) + 1)]
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+            entry[3] += nbytes
+            entry[4][bisect.bisect_left(self.BUCKETS, seconds)] += 1
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+    def stats(self) -> dict:
+        """
+        Returns `{method: {stage: {count, total, mean, max, bytes, histogram}}}`, where the histogram
+        maps each bucket's upper edge in seconds (`inf` for the last) to its number of calls.
+        """
+        edges = (*self.BUCKETS, float('inf'))
+        result = {}
+        with self._lock:
+            for (method, stage), (count, total, longest, nbytes, buckets) in self._stages.items():
+                result.setdefault(method, {})[stage] = {
+                    'count': count,
+                    'total': total,
+                    'mean': total / count,
+                    'max': longest,
+                    'bytes': nbytes,
+                    'histogram': dict(zip(edges, buckets)),
+                }
+        return result
+
+    def report(self) -> str:
+        lines = [f'{"method":<20} {"stage":<10} {"calls":>7} {"total ms":>10} {"mean ms":>9} {"max ms":>9} {"bytes":>12}']
+        for method, stages in sorted(self.stats().items()):
+            for stage, s in stages.items():
+                lines.append(
+                    f'{method:<20} {stage:<10} {s["count"]:>7} {s["total"] * 1000:>10.2f} '
+                    f'{s["mean"] * 1000:>9.3f} {s["max"] * 1000:>9.3f} {s["bytes"]:>12}'
+                )
+        return '\n'.join(lines)
+
+
+def profiled(func):
+    """
+    Records a public method under its name while its window is being profiled.
+    Profiled methods called from within another one count towards the outer method.
+    """
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        window = getattr(self, 'win', self)
+        profiler = window.profiler
+        local = Profiler._local
+        if profiler is None or getattr(local, 'method', None) is not None:
+            return func(self, *args, **kwargs)
+        local.method, local.profiler = name, profiler
+        start = time.perf_counter()
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            profiler.record(name, 'total', time.perf_counter() - start)
+            local.method = local.profiler = None
+            if profiler.round_trip and window.loaded and hasattr(window, '_return_q') and not window.bulk_run.enabled:
+                start = time.perf_counter()
+                window.run_script_and_get('0')
+                profiler.record(name, 'evaluate', time.perf_counter() - start)
+    return wrapper
+
+
+def profiled_stage(stage: str):
+    """
+    Records a stage of the pipeline for the profiled method it is called from. The payload size is
+    the length of the returned string, or else of the last string argument.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            local = Profiler._local
+            profiler = getattr(local, 'profiler', None)
+            if profiler is None and stage == 'send':
+                # sends also happen outside of profiled methods, the first argument is the window
+                profiler = args[0].profiler
+            if profiler is None or getattr(local, 'stage', None) is not None:
+                return func(*args, **kwargs)
+            local.stage = stage
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                local.stage = None
+            seconds = time.perf_counter() - start
+            if isinstance(result, str):
+                nbytes = len(result)
+            else:
+                nbytes = len(args[-1]) if args and isinstance(args[-1], str) else 0
+            profiler.record(getattr(local, 'method', None) or 'background', stage, seconds, nbytes)
+            return result
+        return wrapper
+    return decorator
+
+
 # def js_data(data: Union[pd.DataFrame, pd.Series]):
 #     if isinstance(data, pd.DataFrame):
 #         d = data.to_dict(orient='records')
@@ -153,8 +725,49 @@ def parse_event_message(window, string):
 #         filtered_records = {k: v for k, v in d.items()}
 #     return json.dumps(filtered_records)
 
+def _js_columns(data: pd.DataFrame) -> Optional[str]:
+    """
+    Serializes the columns of a DataFrame straight from their numpy arrays,
+    to be zipped into records by `Lib.zipColumns` on the JS side.
+    String columns are sent as codes into a lookup table.
+    Rows containing NaN are masked out, matching `dropna()`.
+    Returns None if any column can't be serialized this way.
+    """
+    columns, lookups = {}, {}
+    mask = np.ones(len(data), dtype=bool)
+    for name, col in data.items():
+        if isinstance(col.dtype, np.dtype) and col.dtype.kind in 'biuf':
+            values = col.to_numpy()
+            if col.dtype.kind == 'f':
+                # widened like the floats of `to_dict`, rather than printed with float32 precision
+                values = values.astype(np.float64, copy=False)
+                mask &= ~np.isnan(values)
+        elif pd.api.types.infer_dtype(col, skipna=True) in ('string', 'empty'):
+            values, table = pd.factorize(col)
+            mask &= values != -1
+            lookups[str(name)] = table.tolist()
+        else:
+            return None
+        columns[str(name)] = values
+
+    if not mask.all():
+        columns = {name: values[mask] for name, values in columns.items()}
+    columns = {name: np.ascontiguousarray(values) for name, values in columns.items()}
+    try:
+        payload = orjson.dumps(columns, option=orjson.OPT_SERIALIZE_NUMPY).decode('utf-8')
+    except orjson.JSONEncodeError:
+        return None
+    if not lookups:
+        return f'Lib.zipColumns({payload})'
+    return f'Lib.zipColumns({payload}, {orjson.dumps(lookups).decode("utf-8")})'
+
+@profiled_stage('serialize')
 def js_data(data: Union[pd.DataFrame, pd.Series]):
     if isinstance(data, pd.DataFrame):
+        # Fast path for numeric and string columns, skips building a dict per row
+        fast = _js_columns(data)
+        if fast is not None:
+            return fast
         # Converting DataFrame to a list of dictionaries, filtering out NaN values
         filtered_records = data.dropna().to_dict(orient='records')
     else:
@@ -165,6 +778,303 @@ def js_data(data: Union[pd.DataFrame, pd.Series]):
     # Decode bytes to string if necessary (JavaScript consumption requires string)
     return orjson.dumps(filtered_records).decode('utf-8')
 
+@profiled_stage('serialize')
+def js_columnar(data: pd.DataFrame, colors: Optional[tuple] = None):
+    """
+    Serializes a numeric DataFrame as base64 encoded float64 column buffers,
+    which are rebuilt into series data by `Lib.fromColumns` on the JS side.
+    Falls back to `js_data` if any column is not int/float.
+
+    :param colors: optional (up_color, down_color, up_mask) used to color histogram bars.
+    """
+    if any(dtype.kind not in 'iuf' for dtype in data.dtypes):
+        if colors is not None:
+            data = data.assign(color=np.where(colors[2], colors[0], colors[1]))
+        return js_data(data)
+
+    values = data.to_numpy(dtype='<f8')
+    mask = ~np.isnan(values).any(axis=1)
+    if not mask.all():
+        values = values[mask]
+
+    payload = {
+        'length': len(values),
+        'columns': {
+            str(col): b64encode(np.ascontiguousarray(values[:, i]).tobytes()).decode('ascii')
+            for i, col in enumerate(data.columns)
+        },
+    }
+    if colors is not None:
+        up_mask = np.asarray(colors[2], dtype=bool)[mask].astype(np.uint8)
+        payload['colors'] = [colors[0], colors[1], b64encode(up_mask.tobytes()).decode('ascii')]
+    return f'Lib.fromColumns({orjson.dumps(payload).decode("utf-8")})'
+
+@profiled_stage('serialize')
+def js_lines(series: list, time: np.ndarray, values: np.ndarray) -> str:
+    """
+    Serializes a shared time axis and one column of values per series as base64 encoded float64
+    buffers, which `Lib.setLines` turns into the data of each series.
+
+    :param series: JS expressions of the series, one per column of `values`.
+    """
+    time = b64encode(np.ascontiguousarray(time, dtype='<f8').tobytes()).decode('ascii')
+    values = b64encode(np.ascontiguousarray(values.T, dtype='<f8').tobytes()).decode('ascii')
+    return f'Lib.setLines([{", ".join(series)}], "{time}", "{values}")'
+
+DOWNSAMPLE_METHODS = ('lttb', 'minmax', 'ohlc')
+
+
+def _bucket_starts(length: int, buckets: int) -> np.ndarray:
+    # evenly sized, non-empty buckets over `length` rows
+    return np.unique(np.linspace(0, length, buckets, endpoint=False).astype(np.int64))
+
+
+def _bucket_arg(values: np.ndarray, starts: np.ndarray, reduce: np.ufunc) -> np.ndarray:
+    """
+    Returns the position of the first extreme value of each bucket, as chosen by `reduce` (np.maximum or np.minimum).
+    """
+    counts = np.diff(np.append(starts, len(values)))
+    hits = np.flatnonzero(values == np.repeat(reduce.reduceat(values, starts), counts))
+    buckets = np.repeat(np.arange(len(starts)), counts)[hits]
+    return hits[np.unique(buckets, return_index=True)[1]]
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """
+    Returns the positions of the `points` values kept by Largest-Triangle-Three-Buckets downsampling.
+    The first and last values are always kept. To stay vectorised, each triangle is anchored on the
+    averages of the neighbouring buckets, rather than on the point selected in the previous bucket.
+    """
+    length = len(y)
+    if points >= length or points < 3:
+        return np.arange(length)
+    starts = _bucket_starts(length - 2, points - 2) + 1
+    counts = np.diff(np.append(starts, length - 1))
+    inner_x, inner_y = x[1:-1], y[1:-1]
+    mean_x = np.add.reduceat(inner_x, starts - 1) / counts
+    mean_y = np.add.reduceat(inner_y, starts - 1) / counts
+
+    ax = np.repeat(np.append(x[0], mean_x[:-1]), counts)
+    ay = np.repeat(np.append(y[0], mean_y[:-1]), counts)
+    cx = np.repeat(np.append(mean_x[1:], x[-1]), counts)
+    cy = np.repeat(np.append(mean_y[1:], y[-1]), counts)
+    area = np.abs((ax - cx) * (inner_y - ay) - (ax - inner_x) * (cy - ay))
+    return np.concatenate(([0], _bucket_arg(area, starts - 1, np.maximum) + 1, [length - 1]))
+
+
+def minmax_indices(y: np.ndarray, points: int) -> np.ndarray:
+    """
+    Returns the positions of the lowest and highest value of `points // 2` buckets, in order,
+    which keeps the envelope of the values. The last value is always kept.
+    """
+    length = len(y)
+    if points >= length:
+        return np.arange(length)
+    starts = _bucket_starts(length, max(points // 2, 1))
+    return np.unique(np.concatenate((
+        _bucket_arg(y, starts, np.minimum), _bucket_arg(y, starts, np.maximum), [length - 1]
+    )))
+
+
+def resample_ohlc(df: pd.DataFrame, points: int) -> pd.DataFrame:
+    """
+    Aggregates consecutive bars of a formatted OHLC(V) frame into at most `points` bars.
+    Each bar takes the time and open of its first bar, the close of its last bar, the extremes of
+    high and low and the sum of volume. Other columns take the value of the last bar.
+    The last bar is always kept on its own, so that live updates keep matching its time.
+    """
+    length = len(df)
+    if points >= length:
+        return df
+    starts = _bucket_starts(length - 1, max(points - 1, 1))
+    return _reduce_ohlc(df, np.append(starts, length - 1))
+
+
+def aggregate_ohlc(df: pd.DataFrame, interval: float) -> pd.DataFrame:
+    """
+    Aggregates the bars of a formatted OHLC(V) frame, sorted by time, into bars of `interval` seconds.
+    Bars are aligned to multiples of the interval since the epoch, as with `resample_ohlc` otherwise.
+    """
+    if not len(df):
+        return df
+    keys = np.floor(df['time'].to_numpy(dtype=float) / interval)
+    starts = np.flatnonzero(np.diff(keys, prepend=np.nan))
+    bars = _reduce_ohlc(df, starts)
+    bars['time'] = keys[starts] * interval
+    return bars
+
+
+def _reduce_ohlc(df: pd.DataFrame, starts: np.ndarray) -> pd.DataFrame:
+    ends = np.append(starts[1:], len(df)) - 1
+    reducers = {'time': None, 'open': None, 'high': np.maximum, 'low': np.minimum, 'volume': np.add}
+    columns = {}
+    for name, col in df.items():
+        values = col.to_numpy()
+        if name not in reducers or (reducers[name] and values.dtype.kind not in 'iuf'):
+            columns[name] = values[ends]
+        elif reducers[name] is None:
+            columns[name] = values[starts]
+        else:
+            columns[name] = reducers[name].reduceat(values, starts)
+    return pd.DataFrame(columns, index=df.index[starts])
+
+
+PYRAMID_INTERVALS = (1, 10, 60, 300, 900, 3600, 4 * 3600, 86400, 7 * 86400)
+
+
+class OHLCPyramid:
+    """
+    Levels of pre-aggregated bars, from the base bars to the coarsest level with at most `points` bars.
+    Each interval (in seconds) should be a multiple of the previous one, as each level is aggregated from the one below.
+
+    `zoom` picks the finest level showing at most `points` bars within the visible range, and
+    returns that level around the range, surrounded by rings of coarser levels.
+    `update` keeps the levels and the bars sent in step with live bars.
+    """
+    def __init__(self, points: int, intervals: tuple = PYRAMID_INTERVALS):
+        self.points = points
+        self.intervals = intervals
+        self.levels = []        # (interval, BarStore), finest first
+        self.time = np.empty(0)  # times of the bars last sent
+        self.view = None        # (level, start, end) of the bars last sent
+        self.ends = {}          # level -> end (exclusive) of the bars sent from it, the newest from the last level
+
+    def build(self, df: Union[pd.DataFrame, BarStore], base_interval: float = 0) -> pd.DataFrame:
+        """
+        Rebuilds the levels from formatted base bars, and returns the coarsest level.
+        A `BarStore` of base bars is used as the finest level as it is, so bars written to it can be passed to `update`.
+        """
+        self.levels = [(base_interval, df if isinstance(df, BarStore) else BarStore(df))]
+        for interval in self.intervals:
+            if len(self.levels[-1][1]) <= self.points:
+                break
+            if interval > base_interval:
+                self.levels.append((interval, BarStore(aggregate_ohlc(self.levels[-1][1].frame(), interval))))
+        top = len(self.levels) - 1
+        return self._sent(self.levels[top][1].frame(), top, -np.inf, np.inf, {top: np.inf})
+
+    def _sent(self, df, level, start, end, ends):
+        self.time = df['time'].to_numpy(dtype=float)
+        self.view = (level, start, end)
+        self.ends = ends
+        return df
+
+    def level(self, start: float, end: float) -> int:
+        """Returns the finest level with at most `points` bars between `start` and `end`."""
+        for i, (_, store) in enumerate(self.levels):
+            time = store.column('time')
+            if np.searchsorted(time, end, 'right') - np.searchsorted(time, start) <= self.points:
+                return i
+        return len(self.levels) - 1
+
+    def window(self, level: int, start: float, end: float) -> pd.DataFrame:
+        """
+        Returns the bars of `level` between `start` and `end`, with the rest of the data taken from
+        increasingly coarse levels. Each ring is aligned to the interval of the next level, so bars don't overlap.
+        """
+        return self._window(level, start, end)[0]
+
+    def _window(self, level: int, start: float, end: float) -> tuple:
+        before, after, ends = [], [], {}
+        low, high = start, end
+        for i in range(level, len(self.levels)):
+            df = self.levels[i][1].frame()
+            time = df['time'].to_numpy()
+            if i + 1 < len(self.levels):
+                interval = self.levels[i + 1][0]
+                new_low, new_high = np.floor(low / interval) * interval, (np.floor(high / interval) + 1) * interval
+            else:
+                new_low, new_high = -np.inf, np.inf
+            if i == level:
+                before.append(df.iloc[np.searchsorted(time, new_low):np.searchsorted(time, new_high)])
+            else:
+                before.append(df.iloc[np.searchsorted(time, new_low):np.searchsorted(time, low)])
+                after.append(df.iloc[np.searchsorted(time, high):np.searchsorted(time, new_high)])
+            ends[i] = float(new_high)
+            low, high = new_low, new_high
+        return pd.concat(before[::-1] + after), ends
+
+    def zoom(self, bars_before: float, bars_after: float) -> Optional[tuple]:
+        """
+        Maps the bars before and after the visible range (as reported by `range_change`) to times,
+        and returns `(bars, start, end)` if a different level should be shown, or None.
+        The finer level covers three times the visible range, so panning doesn't switch levels at every step.
+        """
+        if not len(self.time) or self.view is None:
+            return None
+        last = len(self.time) - 1
+        start = float(self.time[int(min(max(bars_before, 0), last))])
+        end = float(self.time[int(min(max(last - bars_after, 0), last))])
+        current, low, high = self.view
+        level = self.level(start, end)
+        if level == current and low <= start and end <= high:
+            return None
+        if level == len(self.levels) - 1:
+            return self._sent(self.levels[-1][1].frame(), level, -np.inf, np.inf, {level: np.inf}), start, end
+        span = end - start
+        bars, ends = self._window(level, start - span, end + span)
+        return self._sent(bars, level, start - span, end + span, ends), start, end
+
+    def update(self, start_time: float) -> Optional[pd.DataFrame]:
+        """
+        Re-aggregates the coarser levels after the base bars from `start_time` onwards were written,
+        and returns the bars to update on the chart: those of the levels sent which cover the written times.
+        """
+        if self.view is None:
+            return None
+        for i in range(1, len(self.levels)):
+            (_, below), (interval, store) = self.levels[i - 1], self.levels[i]
+            time = below.column('time')
+            first = np.searchsorted(time, np.floor(start_time / interval) * interval)
+            bars = aggregate_ohlc(below.tail(len(time) - first), interval)
+            if len(store) and len(bars) and store.column('time')[-1] == bars['time'].iat[0]:
+                store.replace_last(bars.iloc[0])
+                bars = bars.iloc[1:]
+            store.extend(bars)
+
+        sent, low = [], start_time
+        for i in sorted(self.ends):
+            interval, store = self.levels[i]
+            time = store.column('time')
+            first = np.searchsorted(time, np.floor(low / interval) * interval if i else low)
+            last = np.searchsorted(time, self.ends[i])
+            if first < last:
+                sent.append(store.tail(len(time) - first).iloc[:last - first])
+            if last == len(time):
+                break
+            low = max(low, self.ends[i])
+        if not sent:
+            return None
+        bars = pd.concat(sent, ignore_index=True)
+        new = bars['time'].to_numpy(dtype=float)
+        self.time = np.append(self.time, new[new > self.time[-1]] if len(self.time) else new)
+        return bars
+
+
+@profiled_stage('downsample')
+def downsample(df: pd.DataFrame, points: Optional[int], method: str = 'lttb') -> pd.DataFrame:
+    """
+    Reduces a formatted frame to about `points` rows for display. The full frame is left untouched.
+    `lttb` and `minmax` select rows by their `value` column, ignoring rows where it is NaN,
+    while `ohlc` aggregates bars with `resample_ohlc`.
+    """
+    if points is None or len(df) <= points:
+        return df
+    if method == 'ohlc':
+        return resample_ohlc(df, points)
+    if 'value' not in df:
+        return df
+    values = df['value'].to_numpy(dtype=float)
+    valid = ~np.isnan(values)
+    if not valid.all():
+        df, values = df[valid], values[valid]
+        if len(df) <= points:
+            return df
+    if method == 'minmax':
+        return df.iloc[minmax_indices(values, points)]
+    return df.iloc[lttb_indices(df['time'].to_numpy(dtype=float), values, points)]
+
+
 def snake_to_camel(s: str):
     components = s.split('_')
     return components[0] + ''.join(x.title() for x in components[1:])
@@ -179,7 +1089,7 @@ def snake_to_camel(s: str):
 #         filtered_dict[key] = val
 #     return f"JSON.parse('{json.dumps(filtered_dict)}')"
 
-def js_json(d: dict):
+def camel_options(d: dict) -> dict:
     filtered_dict = {}
     for key, val in d.items():
         if key == 'self' or val in (None,):
@@ -187,6 +1097,10 @@ def js_json(d: dict):
         if '_' in key:
             key = snake_to_camel(key)
         filtered_dict[key] = val
+    return filtered_dict
+
+def js_json(d: dict):
+    filtered_dict = camel_options(d)
 
     # Serialize the dictionary using orjson, automatically handling types that orjson can serialize
     # Decode the bytes to string for use in JavaScript, escaping single quotes for JavaScript consumption
@@ -251,22 +1165,44 @@ class Emitter:
 
 
 class JSEmitter:
+    """
+    An event emitted by the JS side. Several handlers can be added with `+=`; the JS side is set up once, with the first one.
+    """
     def __init__(self, chart, name, on_iadd, wrapper=None):
         self._on_iadd = on_iadd
         self._chart = chart
         self._name = name
         self._wrapper = wrapper
+        self._handlers = []
+        self._subscribed = False
 
     def __iadd__(self, other):
-        def final_wrapper(*arg):
-            other(self._chart, *arg) if not self._wrapper else self._wrapper(other, self._chart, *arg)
-        async def final_async_wrapper(*arg):
-            await other(self._chart, *arg) if not self._wrapper else await self._wrapper(other, self._chart, *arg)
+        if not self._subscribed:
+            self._subscribed = True
+            self._on_iadd(other)
+        self._handlers.append(other)
+        is_async = any(asyncio.iscoroutinefunction(func) for func in self._handlers)
+        self._chart.win.handlers[self._name] = self._emit_async if is_async else self._emit
+        return self
 
-        self._chart.win.handlers[self._name] = final_async_wrapper if asyncio.iscoroutinefunction(other) else final_wrapper
-        self._on_iadd(other)
+    def __isub__(self, other):
+        if other in self._handlers:
+            self._handlers.remove(other)
         return self
 
+    def _call(self, func, *arg):
+        return func(self._chart, *arg) if not self._wrapper else self._wrapper(func, self._chart, *arg)
+
+    def _emit(self, *arg):
+        for func in list(self._handlers):
+            self._call(func, *arg)
+
+    async def _emit_async(self, *arg):
+        for func in list(self._handlers):
+            result = self._call(func, *arg)
+            if asyncio.iscoroutine(result):
+                await result
+
 
 class Events:
     def __init__(self, chart):
@@ -306,6 +1242,79 @@ class Events:
             wrapper=lambda func, c, *args: func(c, *[float(a) for a in args])
         )
 
+class DataProvider:
+    """
+    Pages bars into a chart as the user scrolls, from an `older` and a `newer` source.
+
+    A source is either a function called with the time of the first (or last) bar of the chart, returning
+    a DataFrame of the bars before (or after) it, or a generator or async generator yielding such frames.
+    A generator function is called once with that time. Functions may be coroutines. None, an empty frame
+    or the end of a generator marks the end of the data in that direction.
+    """
+    def __init__(self, chart, older: Optional[Callable] = None, newer: Optional[Callable] = None, threshold: int = 50):
+        self._chart = chart
+        self._sources = {'older': older, 'newer': newer}
+        self.threshold = threshold
+        self.exhausted = {direction for direction, source in self._sources.items() if source is None}
+        self._loading = set()
+
+    @property
+    def is_async(self) -> bool:
+        return any(
+            asyncio.iscoroutinefunction(source) or inspect.isasyncgenfunction(source) or isinstance(source, AsyncIterator)
+            for source in self._sources.values()
+        )
+
+    def _boundary(self, direction: str) -> Optional[pd.Timestamp]:
+        if not len(self._chart._candle_data):
+            return None
+        time = self._chart.candle_data['time'].iat[0] if direction == 'older' else self._chart._last_bar['time']
+        return pd.to_datetime(time, unit='s')
+
+    def _wanted(self, bars_before: float, bars_after: float) -> list:
+        return [
+            direction for direction, bars in (('older', bars_before), ('newer', bars_after))
+            if bars < self.threshold and direction not in self.exhausted and direction not in self._loading
+        ]
+
+    def _fetch(self, direction: str):
+        source = self._sources[direction]
+        if inspect.isgeneratorfunction(source) or inspect.isasyncgenfunction(source):
+            source = self._sources[direction] = source(self._boundary(direction))
+        if isinstance(source, AsyncIterator):
+            return source.__anext__()
+        if isinstance(source, Iterator):
+            return next(source, None)
+        return source(self._boundary(direction))
+
+    def _add(self, direction: str, chunk: Optional[pd.DataFrame]):
+        if chunk is None or chunk.empty:
+            self.exhausted.add(direction)
+        elif direction == 'older':
+            self._chart.prepend(chunk)
+        else:
+            self._chart.extend(chunk)
+
+    def on_range_change(self, chart, bars_before: float, bars_after: float):
+        for direction in self._wanted(bars_before, bars_after):
+            self._add(direction, self._fetch(direction))
+
+    async def on_range_change_async(self, chart, bars_before: float, bars_after: float):
+        # range changes keep arriving while a chunk is awaited, only one load per direction runs at a time
+        for direction in self._wanted(bars_before, bars_after):
+            self._loading.add(direction)
+            try:
+                chunk = self._fetch(direction)
+                if inspect.isawaitable(chunk):
+                    try:
+                        chunk = await chunk
+                    except StopAsyncIteration:
+                        chunk = None
+                self._add(direction, chunk)
+            finally:
+                self._loading.discard(direction)
+
+
 class BulkRunScript:
     def __init__(self, script_func):
         self.enabled = False
@@ -322,3 +1331,144 @@ class BulkRunScript:
 
     def add_script(self, script):
         self.scripts.append(script)
+
+
+class UpdateCoalescer:
+    """
+    Keeps the latest pending update script per key, calling `flush` at most once per `interval` seconds.
+    """
+    def __init__(self, interval: float, flush: Callable):
+        self.interval = interval
+        self._flush = flush
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def add(self, key, script: str):
+        with self._lock:
+            self._pending[key] = script
+            if self._timer is None:
+                self._timer = threading.Timer(self.interval, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def retry(self):
+        """
+        Calls `flush` again after another interval, keeping the pending updates.
+        """
+        with self._lock:
+            self._timer = threading.Timer(self.interval, self._flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def take(self) -> list:
+        with self._lock:
+            scripts = list(self._pending.values())
+            self._pending.clear()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        return scripts
+
+
+class ScriptBatcher:
+    """
+    Accumulates scripts and sends them, in order, as a single call: at the end of the current
+    asyncio loop iteration, otherwise after `delay` seconds, or as soon as `max_bytes` are pending.
+    """
+    def __init__(self, script_func: Callable, delay: float = 0.005, max_bytes: int = 1_000_000):
+        self.script_func = script_func
+        self.delay = delay
+        self.max_bytes = max_bytes
+        self._scripts = []
+        self._size = 0
+        self._lock = threading.Lock()
+        self._scheduled = False
+        self._timer = None
+
+    def add(self, script: str):
+        with self._lock:
+            self._scripts.append(script)
+            self._size += len(script)
+            if self._size < self.max_bytes:
+                self._schedule()
+                return
+        self.flush()
+
+    def _schedule(self):
+        if self._scheduled:
+            return
+        self._scheduled = True
+        try:
+            asyncio.get_running_loop().call_soon(self.flush)
+        except RuntimeError:
+            self._timer = threading.Timer(self.delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        # the lock is held while sending so concurrent flushes can't reorder scripts
+        with self._lock:
+            scripts, self._scripts, self._size = self._scripts, [], 0
+            self._scheduled = False
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if scripts:
+                self.script_func('\n'.join(scripts))
+
+
+class ResultRouter:
+    """
+    Matches the `(request_id, value, error)` results arriving on a queue to the futures
+    of the requests which asked for them, so concurrent callers can't swap results.
+    """
+    def __init__(self, queue):
+        self.queue = queue
+        self._futures = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def request(self) -> tuple:
+        with self._lock:
+            request_id = next(self._ids)
+            future = self._futures[request_id] = Future()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        return request_id, future
+
+    def discard(self, request_id: int):
+        with self._lock:
+            self._futures.pop(request_id, None)
+
+    def close(self):
+        """
+        Stops the thread, once the queue won't receive results anymore, failing the requests still waiting.
+        """
+        with self._lock:
+            futures, self._futures = self._futures, {}
+            thread, self._thread = self._thread, None
+        for future in futures.values():
+            if future.set_running_or_notify_cancel():
+                future.set_exception(RuntimeError('The results of this request will not arrive.'))
+        if thread is not None:
+            self.queue.put(None)
+            thread.join()
+
+    def _run(self):
+        while True:
+            result = self.queue.get()
+            if result is None:  # closed
+                return
+            request_id, value, error = result
+            with self._lock:
+                future = self._futures.pop(request_id, None)
+            # the request timed out, or its caller was cancelled; running futures can't be cancelled anymore
+            if future is None or not future.set_running_or_notify_cancel():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(value)
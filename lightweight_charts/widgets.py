@@ -1,7 +1,10 @@
 import asyncio
+import functools
 import html
+import os
+import orjson
 
-from .util import parse_event_message
+from .util import capture_script, parse_event_message
 from lightweight_charts import abstract
 
 try:
@@ -113,41 +116,103 @@ class QtChart(abstract.AbstractChart):
     def get_webview(self): return self.webview
 
 
+STATIC_ASSETS = tuple(
+    abstract.INDEX.replace('index.html', name) for name in ('index.html', 'styles.css', 'bundle.js', 'lightweight-charts.js')
+)
+
+
+# Finds the assets published by `shared_assets_script` in a parent window, and inserts one after the calling script.
+SHARED_ASSET_LOADER = '''
+function _lwcInject(name) {
+    var assets, w = window;
+    try {
+        while (!(assets = w._lwcAssets) && w !== w.parent) w = w.parent;
+    } catch (e) {}
+    if (!assets) throw new Error('lightweight-charts assets not found, re-run the cell of the first chart');
+    var element = document.createElement(name === 'css' ? 'style' : 'script');
+    element.textContent = assets[name];
+    document.currentScript.after(element);
+}
+'''
+
+
+def _asset_mtimes() -> tuple:
+    return tuple(os.stat(path).st_mtime_ns for path in STATIC_ASSETS)
+
+
+def static_html(shared: bool = False) -> str:
+    """
+    Returns index.html with its stylesheet and scripts inlined, up to an open `<script>` tag.
+    Built once per process, and again if any of the files changes.\n
+    :param shared: loads the stylesheet and scripts from `window._lwcAssets` of a parent window instead.
+    """
+    return _build_static_html(_asset_mtimes(), shared)
+
+
+def shared_assets_script() -> str:
+    """
+    Returns a script publishing the stylesheet and scripts as `window._lwcAssets`, for `static_html(shared=True)`.
+    """
+    _, css, js, lwc = _read_assets(_asset_mtimes())
+    # keeps the library's own '</script>' strings from closing the tag
+    assets = orjson.dumps({'css': css, 'lwc': lwc, 'bundle': js}).decode('utf-8').replace('</', '<\\/')
+    return f'<script>window._lwcAssets = {assets}</script>'
+
+
+@functools.lru_cache(maxsize=1)
+def _read_assets(mtimes: tuple) -> tuple:
+    assets = []
+    for path in STATIC_ASSETS:
+        with open(path, 'r') as f:
+            assets.append(f.read())
+    return tuple(assets)
+
+
+@functools.lru_cache(maxsize=2)
+def _build_static_html(mtimes: tuple, shared: bool) -> str:
+    index, css, js, lwc = _read_assets(mtimes)
+    if shared:
+        style = f'<script>{SHARED_ASSET_LOADER}_lwcInject("css")</script>'
+        lwc, js = '_lwcInject("lwc")', '_lwcInject("bundle")'
+    else:
+        style = f"<style>{css}</style>"
+    return index \
+        .replace('<link rel="stylesheet" href="styles.css">', style) \
+        .replace(' src="./lightweight-charts.js">', f'>{lwc}') \
+        .replace(' src="./bundle.js">', f'>{js}') \
+        .replace('</body>\n</html>', '<script>')
+
+
 class StaticLWC(abstract.AbstractChart):
     def __init__(self, width=None, height=None, inner_width=1, inner_height=1,
-                 scale_candles_only: bool = False, toolbox=False, autosize=True, leftScale: bool = False):
-
-        with open(abstract.INDEX.replace("index.html", 'styles.css'), 'r') as f:
-            css = f.read()
-        with open(abstract.INDEX.replace("index.html", 'bundle.js'), 'r') as f:
-            js = f.read()
-        with open(abstract.INDEX.replace("index.html", 'lightweight-charts.js'), 'r') as f:
-            lwc = f.read()
-
-        with open(abstract.INDEX, 'r') as f:
-            self._html = f.read() \
-                .replace('<link rel="stylesheet" href="styles.css">', f"<style>{css}</style>") \
-                .replace(' src="./lightweight-charts.js">', f'>{lwc}') \
-                .replace(' src="./bundle.js">', f'>{js}') \
-                .replace('</body>\n</html>', '<script>')
+                 scale_candles_only: bool = False, toolbox=False, autosize=True, leftScale: bool = False,
+                 shared_assets: bool = False):
+        self._prefix = static_html(shared_assets)
+        self._scripts = []   # joined once, rather than concatenating a string per script
 
         super().__init__(abstract.Window(run_script=self.run_script), inner_width, inner_height,
                          scale_candles_only, toolbox, autosize, leftScale=leftScale)
         self.width = width
         self.height = height
+        self.win.width = width
+
+    @property
+    def _html(self) -> str:
+        return ''.join((self._prefix, *('\n' + script for script in self._scripts)))
 
     def run_script(self, script, run_last=False):
+        if capture_script(script, run_last):
+            return
         if run_last:
             self.win.final_scripts.append(script)
         else:
-            self._html += '\n' + script
+            self._scripts.append(script)
 
     def load(self):
         if self.win.loaded:
             return
         self.win.loaded = True
-        for script in self.win.final_scripts:
-            self._html += '\n' + script
+        self._scripts.extend(self.win.final_scripts)
         self._load()
 
     def _load(self): pass
@@ -164,8 +229,13 @@ class StreamlitChart(StaticLWC):
 
 
 class JupyterChart(StaticLWC):
-    def __init__(self, width: int = 800, height=350, inner_width=1, inner_height=1, scale_candles_only: bool = False, toolbox: bool = False, leftScale: bool = False):
-        super().__init__(width, height, inner_width, inner_height, scale_candles_only, toolbox, False, leftScale=leftScale)
+    _assets_published = False
+
+    def __init__(self, width: int = 800, height=350, inner_width=1, inner_height=1, scale_candles_only: bool = False, toolbox: bool = False, leftScale: bool = False,
+                 shared_assets: bool = False):
+        super().__init__(width, height, inner_width, inner_height, scale_candles_only, toolbox, False, leftScale=leftScale,
+                         shared_assets=shared_assets)
+        self._shared_assets = shared_assets
 
         self.run_script(f'''
             for (var i = 0; i < document.getElementsByClassName("tv-lightweight-charts").length; i++) {{
@@ -182,6 +252,10 @@ class JupyterChart(StaticLWC):
     def _load(self):
         if HTML is None:
             raise ModuleNotFoundError('IPython.display.HTML was not found, and must be installed to use JupyterChart.')
+        if self._shared_assets and not JupyterChart._assets_published:
+            # once per kernel; the following charts load the library from this output
+            display(HTML(shared_assets_script()))
+            JupyterChart._assets_published = True
         html_code = html.escape(f"{self._html}</script></body></html>")
         iframe = f'<iframe width="{self.width}" height="{self.height}" frameBorder="0" srcdoc="{html_code}"></iframe>'
         display(HTML(iframe))
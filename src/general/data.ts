@@ -0,0 +1,76 @@
+export interface ColumnarPayload {
+    length: number;
+    // base64 encoded, little-endian float64 buffers keyed by field name
+    columns: {[name: string]: string};
+    // [upColor, downColor, base64 encoded uint8 mask (1 = up)]
+    colors?: [string, string, string];
+}
+
+function decodeBase64(encoded: string) {
+    const binary = atob(encoded);
+    const bytes = new Uint8Array(binary.length);
+    for (let i = 0; i < binary.length; i++) bytes[i] = binary.charCodeAt(i);
+    return bytes;
+}
+
+// Builds a list of records from column arrays of equal length.
+// Columns present in `lookups` hold indices into the given table.
+export function zipColumns(columns: {[name: string]: ArrayLike<any>}, lookups: {[name: string]: any[]} = {}) {
+    const names = Object.keys(columns);
+    const arrays = names.map((name) => columns[name]);
+    const tables = names.map((name) => lookups[name]);
+    const length = names.length ? arrays[0].length : 0;
+
+    const data: any[] = new Array(length);
+    for (let i = 0; i < length; i++) {
+        const row: any = {};
+        for (let j = 0; j < names.length; j++) {
+            row[names[j]] = tables[j] ? tables[j][arrays[j][i]] : arrays[j][i];
+        }
+        data[i] = row;
+    }
+    return data;
+}
+
+export function fromColumns(payload: ColumnarPayload) {
+    const columns: {[name: string]: ArrayLike<number>} = {};
+    for (const name of Object.keys(payload.columns)) {
+        columns[name] = new Float64Array(decodeBase64(payload.columns[name]).buffer);
+    }
+    if (!payload.colors) return zipColumns(columns);
+
+    columns.color = decodeBase64(payload.colors[2]);
+    return zipColumns(columns, {color: [payload.colors[1], payload.colors[0]]});
+}
+
+// Sets the data of several series sharing one time axis, from base64 encoded float64 buffers.
+// `values` holds one column of `time.length` values per series; NaN values are left out.
+export function setLines(series: any[], time: string, values: string) {
+    const times = new Float64Array(decodeBase64(time).buffer);
+    const columns = new Float64Array(decodeBase64(values).buffer);
+    for (let i = 0; i < series.length; i++) {
+        const column = columns.subarray(i * times.length, (i + 1) * times.length);
+        const data = [];
+        for (let j = 0; j < times.length; j++) {
+            if (!isNaN(column[j])) data.push({time: times[j], value: column[j]});
+        }
+        series[i].setData(data);
+    }
+}
+
+// Adds bars older than the first bar of the series. The existing bars are taken from the series,
+// rather than being sent again.
+export function prependData(series: any, bars: any[]) {
+    const data = series.data();
+    const first = data.length ? data[0].time : Infinity;
+    series.setData(bars.filter((bar) => bar.time < first).concat(data));
+}
+
+// Adds bars newer than the last bar of the series.
+export function appendData(series: any, bars: any[]) {
+    const data = series.data();
+    const last = data.length ? data[data.length - 1].time : -Infinity;
+    for (const bar of bars) {
+        if (bar.time > last) series.update(bar);
+    }
+}
@@ -0,0 +1,27 @@
+// A command sent from Python: [opcode, target, args].
+// The target is a dotted path from `window`, where a `()` suffix calls a getter such as `priceScale()`.
+export type Command = [string, string, any[]];
+
+function resolve(path: string) {
+    const keys = path.split('.');
+    let target: any = window;
+    for (let i = keys[0] === 'window' ? 1 : 0; i < keys.length && target !== undefined; i++) {
+        const key = keys[i];
+        target = key.endsWith('()') ? target[key.slice(0, -2)]() : target[key];
+    }
+    return target;
+}
+
+const opcodes: {[opcode: string]: (target: any, args: any[]) => void} = {
+    apply: (target, [options]) => target.applyOptions(options),
+    assign: (target, [properties]) => Object.assign(target, properties),
+    call: (target, [method, ...args]) => target[method](...args),
+};
+
+// Runs commands in order; commands whose target doesn't exist (such as a missing volume series) are skipped.
+export function dispatch(commands: Command[]) {
+    for (const [opcode, path, args] of commands) {
+        const target = resolve(path);
+        if (target !== undefined) opcodes[opcode](target, args);
+    }
+}
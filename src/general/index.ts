@@ -6,4 +6,8 @@ export * from './legend';
 export * from './table';
 export * from './toolbox';
 export * from './topbar';
-export * from '../horizontal-line/ray-line';
\ No newline at end of file
+export * from '../horizontal-line/ray-line';
+export * from './data';
+export * from './markers';
+export * from './dispatch';
+export * from './page';
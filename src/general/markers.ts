@@ -0,0 +1,52 @@
+import { ISeriesApi, SeriesMarker, SeriesType, Time } from "lightweight-charts";
+
+type Marker = SeriesMarker<Time> & {id: number};
+
+// Holds the markers of a series by id, applying add/remove deltas
+// and calling setMarkers at most once per animation frame.
+export class MarkerStore {
+    private _markers = new Map<number, Marker>();
+    private _frame: number | null = null;
+
+    constructor(private _series: ISeriesApi<SeriesType>) {}
+
+    add(markers: Marker[]) {
+        for (const marker of markers) this._markers.set(marker.id, marker);
+        this._schedule();
+    }
+
+    remove(ids: number[]) {
+        for (const id of ids) this._markers.delete(id);
+        this._schedule();
+    }
+
+    clear() {
+        this._markers.clear();
+        this._schedule();
+    }
+
+    private _schedule() {
+        if (this._frame !== null) return;
+        this._frame = requestAnimationFrame(() => {
+            this._frame = null;
+            this._flush();
+        });
+    }
+
+    private _flush() {
+        const markers = Array.from(this._markers.values());
+        markers.sort((a, b) => (a.time as number) - (b.time as number));
+        this._series.setMarkers(markers as any);
+    }
+}
+
+const stores = new WeakMap<ISeriesApi<SeriesType>, MarkerStore>();
+
+export function markerStore(series: ISeriesApi<SeriesType>) {
+    let store = stores.get(series);
+    if (!store) {
+        store = new MarkerStore(series);
+        stores.set(series, store);
+    }
+    return store;
+}
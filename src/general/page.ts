@@ -0,0 +1,27 @@
+import { globalParamInit } from './global-params';
+import { Handler } from './handler';
+
+// Removes everything left by the previous chart, so a loaded page can be reused by the next one.
+export function resetPage() {
+    for (const key of Object.keys(window)) {
+        if (!/^_lwc\d+/.test(key)) continue;
+        const obj = (window as any)[key];
+        if (obj instanceof Handler) {
+            // its keydown and resize listeners outlive the chart
+            obj.commandFunctions.length = 0;
+            obj.reSize = () => {};
+            obj.chart.remove();
+        }
+        delete (window as any)[key];
+    }
+    for (const element of Array.from(document.body.children)) {
+        if (element.tagName !== 'SCRIPT') element.remove();
+    }
+    document.documentElement.removeAttribute('style');
+    document.body.removeAttribute('style');
+
+    const container = document.createElement('div');
+    container.id = 'container';
+    document.body.prepend(container);
+    globalParamInit();
+}
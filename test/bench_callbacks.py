@@ -0,0 +1,59 @@
+"""
+Latency benchmark for callback delivery in `Chart.show_async`.
+
+A separate process stands in for the webview: like `CallbackAPI.callback`, it puts
+`callbackFunction` messages onto `Chart.WV.emit_queue`, stamped with the send time.
+The Python handler records how long each message took to arrive. The previous
+50 ms polling loop is measured for comparison.
+
+    python bench_callbacks.py
+"""
+import asyncio
+import multiprocessing as mp
+import statistics
+import time
+
+from lightweight_charts import Chart
+from lightweight_charts.util import parse_event_message
+
+MESSAGES = 200
+GAP = 0.005
+
+
+def fake_webview(emit_queue, count, gap):
+    for _ in range(count):
+        time.sleep(gap)
+        emit_queue.put(f'bench_~_{time.monotonic()}')
+    emit_queue.put(None)
+
+
+async def polling_handle_events(chart):
+    while 1:
+        while Chart.WV.emit_queue.empty() and chart.is_alive:
+            await asyncio.sleep(0.05)
+        response = Chart.WV.emit_queue.get()
+        if response is None:
+            return
+        func, args = parse_event_message(chart.win, response)
+        func(*args)
+
+
+def run(chart, handle_events):
+    latencies = []
+    chart.win.handlers['bench'] = lambda sent: latencies.append(time.monotonic() - float(sent))
+    sender = mp.Process(target=fake_webview, args=(Chart.WV.emit_queue, MESSAGES, GAP), daemon=True)
+    sender.start()
+    asyncio.run(handle_events(chart))
+    sender.join()
+    return latencies
+
+
+def report(name, latencies):
+    ms = sorted(latency * 1000 for latency in latencies)
+    print(f'{name:<10} median {statistics.median(ms):7.3f}ms   p99 {ms[int(len(ms) * 0.99) - 1]:7.3f}ms   max {ms[-1]:7.3f}ms')
+
+
+if __name__ == '__main__':
+    chart = Chart()
+    report('polling', run(chart, polling_handle_events))
+    report('threaded', run(chart, Chart._handle_events))
@@ -0,0 +1,66 @@
+"""
+Benchmark for the downsampling of `set` on a chart 1000 pixels wide.
+
+Compares the time and script size of `Line.set` (LTTB), `Histogram.set` (min/max)
+and `Candlestick.set` (OHLC bars) with and without `AbstractChart.downsample`,
+on a chart which only collects its scripts.
+
+    python bench_downsample.py
+"""
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from lightweight_charts.widgets import StaticLWC
+
+SIZES = (100_000, 1_000_000, 5_000_000)
+WIDTH = 1000
+
+
+def make_ohlcv(rows):
+    rng = np.random.default_rng(0)
+    close = 100 + rng.standard_normal(rows).cumsum()
+    return pd.DataFrame({
+        'open': close + rng.standard_normal(rows) * 0.1,
+        'high': close + 0.5,
+        'low': close - 0.5,
+        'close': close,
+        'volume': rng.integers(100, 10_000, rows).astype(float),
+    }, index=pd.date_range('2020-01-01', periods=rows, freq='s'))
+
+
+def best_of(func, repeat=3):
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def bench(rows, downsample):
+    df = make_ohlcv(rows)
+    chart = StaticLWC(width=WIDTH)
+    chart.downsample(downsample)
+    line = chart.create_line('close')
+    histogram = chart.create_histogram('volume')
+    sizes = {}
+    # keep the scripts out of the measurement, only their size is recorded
+    for obj in (chart, line, histogram):
+        obj.run_script = lambda script, *args, **kwargs: sizes.__setitem__('last', len(script))
+
+    cases = {
+        'Line.set': lambda: line.set(df['close']),
+        'Histogram.set': lambda: histogram.set(df['volume']),
+        'Candlestick.set': lambda: chart.set(df[['open', 'high', 'low', 'close']]),
+    }
+    results = {}
+    for name, func in cases.items():
+        seconds = best_of(func)
+        results[name] = (seconds, sizes['last'])
+    return results
+
+
+if __name__ == '__main__':
+    print(f'{"rows":>10} {"case":<16} {"full":>10} {"bytes":>12} {"downsampled":>12} {"bytes":>10}')
+    for rows in SIZES:
+        full, reduced = bench(rows, False), bench(rows, True)
+        for name in full:
+            (slow, slow_bytes), (fast, fast_bytes) = full[name], reduced[name]
+            print(f'{rows:>10} {name:<16} {slow:>9.3f}s {slow_bytes:>12,} {fast:>11.3f}s {fast_bytes:>10,}')
@@ -0,0 +1,58 @@
+"""
+Micro-benchmark for `util.IDGen`.
+
+Times batches of allocations as the number of live ids grows to 1M, for the
+counter-based allocator and, up to a smaller size, for the previous random
+8-letter allocator which scanned a list on every call.
+
+    python bench_idgen.py
+"""
+import time
+from random import choices
+
+from lightweight_charts.util import IDGen
+
+TOTAL = 1_000_000
+BATCH = 10_000
+LEGACY_TOTAL = 50_000
+
+
+class ListIDGen(list):
+    ascii = 'abcdefghijklmnopqrstuvwxyz'
+
+    def generate(self) -> str:
+        var = ''.join(choices(self.ascii, k=8))
+        if var not in self:
+            self.append(var)
+            return f'window.{var}'
+        return self.generate()
+
+
+def per_call(gen, total):
+    results = []
+    for allocated in range(0, total, BATCH):
+        start = time.perf_counter()
+        for _ in range(BATCH):
+            gen.generate()
+        results.append((allocated + BATCH, (time.perf_counter() - start) / BATCH))
+    return results
+
+
+def bench_recycling(gen, rounds=BATCH):
+    ids = [gen.generate() for _ in range(rounds)]
+    start = time.perf_counter()
+    for var in ids:
+        gen.release(var)
+        gen.generate()
+    return (time.perf_counter() - start) / rounds
+
+
+if __name__ == '__main__':
+    counter = per_call(IDGen(), TOTAL)
+    legacy = dict(per_call(ListIDGen(), LEGACY_TOTAL))
+    print(f'{"live ids":>10} {"counter":>12} {"list":>12}')
+    for allocated, seconds in counter:
+        if allocated in legacy or allocated % 100_000 == 0:
+            old = f'{legacy[allocated] * 1e6:>10.2f}us' if allocated in legacy else f'{"-":>12}'
+            print(f'{allocated:>10} {seconds * 1e6:>10.2f}us {old}')
+    print(f'release + generate: {bench_recycling(IDGen()) * 1e6:.2f}us')
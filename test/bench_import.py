@@ -0,0 +1,37 @@
+"""
+Import-time benchmark for `lightweight_charts`.
+
+Times each statement in a fresh interpreter, so nothing is cached between runs,
+and reports the best of several runs.
+
+    python bench_import.py
+"""
+import subprocess
+import sys
+import time
+
+RUNS = 5
+STATEMENTS = (
+    'pass',
+    'import lightweight_charts',
+    'from lightweight_charts import AbstractChart',
+    'from lightweight_charts import Chart',
+    'from lightweight_charts import JupyterChart',
+    'import pandas; import lightweight_charts',
+)
+
+
+def best_time(statement):
+    times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', statement], check=True)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+if __name__ == '__main__':
+    baseline = best_time('pass')
+    print(f'{"statement":<48} {"seconds":>8}')
+    for statement in STATEMENTS[1:]:
+        print(f'{statement:<48} {best_time(statement) - baseline:>8.3f}')
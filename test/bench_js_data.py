@@ -0,0 +1,76 @@
+"""
+Micro-benchmark for the numpy fast path of `util.js_data`.
+
+Compares the previous `dropna().to_dict(orient='records')` serialization against
+the current path, both for `js_data` alone and for `Line.set`, `Histogram.set`
+and `Candlestick.set` on a chart which only collects its scripts.
+
+    python bench_js_data.py
+"""
+import timeit
+
+import numpy as np
+import orjson
+import pandas as pd
+
+from lightweight_charts import abstract, util
+from lightweight_charts.widgets import StaticLWC
+
+SIZES = (10_000, 100_000, 1_000_000)
+
+
+def records_js_data(data):
+    if isinstance(data, pd.DataFrame):
+        return orjson.dumps(data.dropna().to_dict(orient='records')).decode('utf-8')
+    return orjson.dumps(data.dropna().to_dict()).decode('utf-8')
+
+
+def make_ohlcv(rows):
+    rng = np.random.default_rng(0)
+    close = 100 + rng.standard_normal(rows).cumsum()
+    return pd.DataFrame({
+        'open': close + rng.standard_normal(rows) * 0.1,
+        'high': close + 0.5,
+        'low': close - 0.5,
+        'close': close,
+        'volume': rng.integers(100, 10_000, rows).astype(float),
+    }, index=pd.date_range('2020-01-01', periods=rows, freq='s'))
+
+
+def best_of(func, repeat=3):
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def bench(rows):
+    df = make_ohlcv(rows)
+    chart = StaticLWC()
+    line = chart.create_line('close')
+    histogram = chart.create_histogram('volume')
+    # keep the scripts out of the measurement, the chart is never loaded
+    for obj in (chart, line, histogram):
+        obj.run_script = lambda *args, **kwargs: None
+
+    formatted = chart._df_datetime_format(df)
+    cases = {
+        'js_data': lambda: abstract.js_data(formatted),
+        'Line.set': lambda: line.set(df['close']),
+        'Histogram.set': lambda: histogram.set(df['volume']),
+        'Candlestick.set': lambda: chart.set(df),
+    }
+    results = {}
+    for name, func in cases.items():
+        fast = best_of(func)
+        abstract.js_data = records_js_data
+        try:
+            slow = best_of(func)
+        finally:
+            abstract.js_data = util.js_data
+        results[name] = (slow, fast)
+    return results
+
+
+if __name__ == '__main__':
+    print(f'{"rows":>10} {"case":<16} {"records":>10} {"numpy":>10} {"speedup":>8}')
+    for rows in SIZES:
+        for name, (slow, fast) in bench(rows).items():
+            print(f'{rows:>10} {name:<16} {slow:>9.3f}s {fast:>9.3f}s {slow / fast:>7.1f}x')
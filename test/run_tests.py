@@ -5,6 +5,12 @@ from test_table import TestTable
 from test_toolbox import TestToolBox
 from test_topbar import TestTopBar
 from test_chart import TestChart
+from test_data import TestInferInterval, TestIntervalCache, TestJSColumnar, TestJSData
+from test_series import TestBarStore, TestCopy, TestUpdateFromTicks, TestDataProvider, TestDownsample, TestMarkerStore, TestOHLCPyramid, TestSetLines
+from test_window import TestDispatch, TestIDGen, TestProfiler, TestResultRouter, TestScriptBatcher, TestUpdateCoalescer
+from test_handler import TestMessageRouter, TestRecycledWindows, TestSharedScriptBuffer, TestStandbyWindows
+from test_widgets import TestStaticLWC
+from test_helpers import TestLazyImport, TestOrderedCalls
 
 
 TEST_CASES = [
@@ -13,6 +19,31 @@ TEST_CASES = [
     TestToolBox,
     TestTopBar,
     TestChart,
+    TestJSData,
+    TestJSColumnar,
+    TestInferInterval,
+    TestIntervalCache,
+    TestBarStore,
+    TestCopy,
+    TestUpdateFromTicks,
+    TestUpdateCoalescer,
+    TestMarkerStore,
+    TestIDGen,
+    TestScriptBatcher,
+    TestSharedScriptBuffer,
+    TestResultRouter,
+    TestDispatch,
+    TestProfiler,
+    TestLazyImport,
+    TestStandbyWindows,
+    TestMessageRouter,
+    TestRecycledWindows,
+    TestStaticLWC,
+    TestSetLines,
+    TestOrderedCalls,
+    TestDownsample,
+    TestOHLCPyramid,
+    TestDataProvider,
 ]
 
 if __name__ == '__main__':
@@ -0,0 +1,204 @@
+import gc
+import unittest
+from base64 import b64decode
+from unittest import mock
+import numpy as np
+import orjson
+import pandas as pd
+
+from lightweight_charts import util
+from lightweight_charts.util import _js_columns, datetime_seconds, infer_interval, js_columnar, js_data
+from lightweight_charts.widgets import StaticLWC
+
+
+def zip_columns(script: str) -> list:
+    # the records `Lib.zipColumns` builds from a script of `js_data`
+    args = orjson.loads(f'[{script[len("Lib.zipColumns("):-1]}]')
+    columns, lookups = args[0], args[1] if len(args) > 1 else {}
+    length = len(next(iter(columns.values()))) if columns else 0
+    return [{name: lookups[name][values[i]] if name in lookups else values[i] for name, values in columns.items()}
+            for i in range(length)]
+
+
+def from_columns(script: str) -> list:
+    # the records `Lib.fromColumns` builds from a script of `js_columnar`
+    payload = orjson.loads(script[len('Lib.fromColumns('):-1])
+    columns = {name: np.frombuffer(b64decode(data), dtype='<f8') for name, data in payload['columns'].items()}
+    if 'colors' in payload:
+        up, down, mask = payload['colors']
+        columns['color'] = np.where(np.frombuffer(b64decode(mask), dtype=np.uint8), up, down)
+    assert all(len(values) == payload['length'] for values in columns.values())
+    return [{name: values[i].item() for name, values in columns.items()} for i in range(payload['length'])]
+
+
+def records(df: pd.DataFrame) -> list:
+    # the records of `js_data` before its columnar fast path
+    return orjson.loads(orjson.dumps(df.dropna().to_dict(orient='records')))
+
+
+class TestJSData(unittest.TestCase):
+    def assertMatchesRecords(self, df):
+        script = js_data(df)
+        self.assertTrue(script.startswith('Lib.zipColumns('))
+        self.assertEqual(zip_columns(script), records(df))
+
+    def test_nan_rows_are_masked(self):
+        self.assertMatchesRecords(pd.DataFrame({
+            'time': np.arange(5.0),
+            'value': [1.5, np.nan, 3.0, np.nan, 5.25],
+            'other': [np.nan, 2.0, 3.0, 4.0, 5.0],
+        }))
+
+    def test_integer_float32_and_bool_columns(self):
+        self.assertMatchesRecords(pd.DataFrame({
+            'time': np.arange(4, dtype=np.int64),
+            'small': np.array([1, 2, 3, 4], dtype=np.uint8),
+            'value': np.array([0.1, np.nan, 2.5, 1e-7], dtype=np.float32),
+            'flag': [True, False, True, False],
+        }))
+
+    def test_string_and_none_columns(self):
+        self.assertMatchesRecords(pd.DataFrame({
+            'time': np.arange(5.0),
+            'color': ['red', None, 'blue', 'red', 'green'],
+            'text': pd.Series(['a', 'b', None, 'a', 'é'], dtype='string'),
+        }))
+
+    def test_empty_frame(self):
+        self.assertMatchesRecords(pd.DataFrame({'time': np.array([], dtype=float), 'value': np.array([], dtype=float)}))
+
+    def test_datetime_columns_fall_back(self):
+        df = pd.DataFrame({'time': np.arange(3.0), 'date': pd.date_range('2024-01-01', periods=3, tz='UTC')})
+        self.assertIsNone(_js_columns(df))
+        mixed = pd.DataFrame({'time': np.arange(3.0), 'value': [1, 'a', 2.0]})
+        self.assertIsNone(_js_columns(mixed))
+        self.assertEqual(orjson.loads(js_data(mixed)), records(mixed))
+
+
+
+class TestJSColumnar(unittest.TestCase):
+    def test_round_trip_drops_nan_rows(self):
+        df = pd.DataFrame({
+            'time': np.arange(6, dtype=np.int64),
+            'open': [1.0, 2.0, np.nan, 4.0, 5.0, 6.0],
+            'close': np.array([1.5, 2.5, 3.5, 4.5, np.nan, 6.5], dtype=np.float32),
+        })
+        script = js_columnar(df)
+        self.assertTrue(script.startswith('Lib.fromColumns('))
+        self.assertEqual(from_columns(script), records(df.astype(float)))
+
+    def test_volume_colors_match_records(self):
+        df = pd.DataFrame({
+            'open': [1.0, 2.0, 3.0, 2.0], 'high': 4.0, 'low': 0.5, 'close': [2.0, 1.0, np.nan, 3.0],
+            'volume': [10.0, 20.0, 30.0, 40.0],
+        }, index=pd.date_range('2024-01-01', periods=4, freq='min'))
+        scripts = {}
+        for columnar in (False, True):
+            chart = StaticLWC()
+            chart.volume_config(up_color='green', down_color='red')
+            chart.set(df, columnar=columnar)
+            scripts[columnar] = next(s for s in chart._scripts if '.volumeSeries.setData(' in s and 'setData([])' not in s)
+        self.assertIn('Lib.fromColumns(', scripts[True])
+        columnar = from_columns(scripts[True][scripts[True].index('Lib.fromColumns('):-1])
+        self.assertEqual(columnar, zip_columns(scripts[False][scripts[False].index('Lib.zipColumns('):-1]))
+        self.assertEqual([bar['color'] for bar in columnar], ['green', 'red', 'red', 'green'])
+
+    def test_non_numeric_columns_fall_back(self):
+        df = pd.DataFrame({'time': np.arange(3.0), 'value': [1.0, np.nan, 3.0], 'color': ['red', 'blue', 'red']})
+        self.assertEqual(js_columnar(df), js_data(df))
+        colored = js_columnar(df[['time', 'value']].assign(text='a'), ('green', 'red', np.array([True, False, False])))
+        self.assertEqual(zip_columns(colored), [
+            {'time': 0.0, 'value': 1.0, 'text': 'a', 'color': 'green'},
+            {'time': 2.0, 'value': 3.0, 'text': 'a', 'color': 'red'},
+        ])
+
+
+
+def value_counts_interval(times: pd.Series):
+    # the interval and offset as inferred before sampling, with `value_counts` over every time
+    interval = times.diff().value_counts().index[0].total_seconds()
+    units = [
+        pd.Timedelta(microseconds=times.dt.microsecond.value_counts().index[0]),
+        pd.Timedelta(seconds=times.dt.second.value_counts().index[0]),
+        pd.Timedelta(minutes=times.dt.minute.value_counts().index[0]),
+        pd.Timedelta(hours=times.dt.hour.value_counts().index[0]),
+        pd.Timedelta(days=times.dt.day.value_counts().index[0]),
+    ]
+    offset = 0
+    for value in units:
+        value = value.total_seconds()
+        if value == 0:
+            continue
+        elif value >= interval:
+            break
+        offset = value
+        break
+    return interval, offset
+
+
+class TestInferInterval(unittest.TestCase):
+    def assertMatchesValueCounts(self, index):
+        self.assertEqual(infer_interval(index), value_counts_interval(pd.Series(index)))
+
+    def test_irregular_gaps(self):
+        # 5 minute bars at :02, :07, .. during sessions of 6.5 hours, with overnight and weekend gaps
+        days = pd.bdate_range('2024-01-01', periods=30)
+        bars = pd.timedelta_range('14:32:00', periods=78, freq='5min')
+        self.assertMatchesValueCounts(pd.DatetimeIndex([day + bar for day in days for bar in bars]))
+
+    def test_tz_aware_index(self):
+        index = pd.date_range('2024-03-01 09:30', periods=2000, freq='h', tz='America/New_York')
+        self.assertMatchesValueCounts(index)
+        self.assertEqual(infer_interval(index), (3600.0, 1800.0))
+
+    def test_non_ns_units(self):
+        index = pd.date_range('2024-01-01 00:00:15', periods=500, freq='min')
+        for unit in ('s', 'ms', 'us', 'ns'):
+            with self.subTest(unit=unit):
+                self.assertMatchesValueCounts(index.as_unit(unit))
+                self.assertEqual(datetime_seconds(index.as_unit(unit))[0], index[0].timestamp())
+
+    def test_sampled_matches_full(self):
+        index = pd.date_range('2024-01-01', periods=100_000, freq='10s').delete(range(5000, 5600))
+        self.assertEqual(infer_interval(index, sample=1000), value_counts_interval(pd.Series(index)))
+
+    def test_fewer_than_two_times(self):
+        self.assertIsNone(infer_interval(pd.DatetimeIndex(['2024-01-01'])))
+        self.assertIsNone(infer_interval(pd.DatetimeIndex(['2024-01-01', None])))
+
+
+class TestIntervalCache(unittest.TestCase):
+    def setUp(self):
+        self.index = pd.date_range('2024-01-01', periods=1000, freq='min')
+        self.calls = mock.patch.object(util, '_infer_interval', wraps=util._infer_interval)
+        self.infer = self.calls.start()
+
+    def tearDown(self):
+        self.calls.stop()
+
+    def test_cached_per_index(self):
+        first = infer_interval(pd.Series(self.index), self.index)
+        second = infer_interval(self.index.copy(), self.index)
+        self.assertEqual(first, second)
+        self.assertEqual(self.infer.call_count, 1)
+        self.assertIn(id(self.index), util._interval_cache)
+
+    def test_times_not_matching_the_index_are_not_cached(self):
+        shifted = self.index + pd.Timedelta(seconds=30)
+        self.assertEqual(infer_interval(shifted, self.index), (60.0, 30.0))
+        self.assertNotIn(id(self.index), util._interval_cache)
+        self.assertEqual(infer_interval(self.index.as_unit('s'), self.index.as_unit('ms')), (60.0, 0))
+        self.assertEqual(self.infer.call_count, 2)
+
+    def test_entry_evicted_with_its_index(self):
+        infer_interval(self.index, self.index)
+        key = id(self.index)
+        self.assertIn(key, util._interval_cache)
+        self.infer.reset_mock()     # drops the mock's reference to the index
+        del self.index
+        gc.collect()
+        self.assertNotIn(key, util._interval_cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
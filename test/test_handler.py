@@ -0,0 +1,87 @@
+import asyncio
+import multiprocessing as mp
+import queue
+import types
+import unittest
+
+from lightweight_charts.chart import MessageRouter, PyWV, SharedScriptBuffer, WebviewHandler
+
+
+class TestSharedScriptBuffer(unittest.TestCase):
+    def setUp(self):
+        self.buffer = SharedScriptBuffer.create(16, mp.Value('q', 0))
+
+    def tearDown(self):
+        self.buffer.close(unlink=True)
+
+    def test_round_trip_wraps_around(self):
+        for script in ('abcdefghij', 'klmnopqrs€', '0123456789'):
+            _, start, length = self.buffer.write(script)
+            self.assertEqual(self.buffer.read(start, length), script)
+
+    def test_full_buffer_falls_back(self):
+        self.assertIsNotNone(self.buffer.write('a' * 10))
+        self.assertIsNone(self.buffer.write('b' * 10))
+        self.assertIsNone(self.buffer.write('c' * 17))
+
+
+class TestStandbyWindows(unittest.TestCase):
+    def test_take_window_prefers_standby(self):
+        handler = WebviewHandler()
+        handler.standby.append(handler.create_window(800, 600, None, None, hidden=True))
+        first, first_token = handler.take_window(400, 300, 10, 20, title='first')
+        second, second_token = handler.take_window(400, 300, 10, 20, title='second')
+        self.assertEqual((first, second), (0, 1))
+        self.assertNotEqual(first_token, second_token)
+        commands = [handler.function_call_queue.get(timeout=1)[0] for _ in range(3)]
+        self.assertEqual(commands, ['create_window', 'configure', 'create_window'])
+
+
+
+class TestMessageRouter(unittest.TestCase):
+    def test_messages_reach_their_chart(self):
+        emit_queue, exited = queue.Queue(), []
+        router = MessageRouter(emit_queue, exited.append)
+
+        async def read(token, count):
+            messages = asyncio.Queue()
+            router.subscribe(token, asyncio.get_running_loop(), messages)
+            return [await messages.get() for _ in range(count)]
+
+        async def main():
+            first, second = asyncio.create_task(read(1, 3)), asyncio.create_task(read(2, 2))
+            await asyncio.sleep(0.05)
+            for message in ('_~_~CLOSED~_~_2', 'click_~_a', '_~_~CLOSED~_~_1', 'exit'):
+                emit_queue.put(message)
+            return await first, await second
+
+        first, second = asyncio.run(main())
+        self.assertEqual(first, ['click_~_a', '_~_~CLOSED~_~_1', 'exit'])
+        self.assertEqual(second, ['_~_~CLOSED~_~_2', 'exit'])
+        self.assertEqual(exited, [router])
+
+    def test_wake_needs_a_reader(self):
+        emit_queue = queue.Queue()
+        router = MessageRouter(emit_queue)
+        self.assertFalse(router.wake(0))
+        self.assertTrue(emit_queue.empty())
+
+
+class TestRecycledWindows(unittest.TestCase):
+    def test_requests_to_recycled_windows_are_answered(self):
+        pywv = PyWV.__new__(PyWV)
+        pywv.queue, pywv.return_queue = queue.Queue(), queue.Queue()
+        pywv.is_alive, pywv.recycled, pywv.shared_buffer = True, {0}, None
+        pywv.windows = [None, types.SimpleNamespace(hide=lambda: setattr(pywv, 'is_alive', False))]
+        pywv.queue.put((0, '_~_~RETURN~_~_5_~_1 + 1'))
+        pywv.queue.put((0, 'Lib.resetPage()'))
+        pywv.queue.put((1, 'hide'))
+        pywv.loop()
+        request_id, value, error = pywv.return_queue.get_nowait()
+        self.assertEqual((request_id, value), (5, None))
+        self.assertIsInstance(error, RuntimeError)
+        self.assertTrue(pywv.return_queue.empty())
+
+
+if __name__ == '__main__':
+    unittest.main()
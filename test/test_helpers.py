@@ -0,0 +1,129 @@
+import contextlib
+import io
+import os
+import re
+import subprocess
+import sys
+import unittest
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ThreadPoolExecutor
+from lightweight_charts.helpers import OrderedCalls, Panel, chart
+from lightweight_charts import util
+from lightweight_charts.widgets import StaticLWC
+from lightweight_charts.util import apply_opacity, color_to_rgb
+
+
+class TestOrderedCalls(unittest.TestCase):
+    def scripts(self, executor):
+        chart = StaticLWC()
+        index = pd.date_range('2024-01-01', periods=500, freq='min')
+        calls = OrderedCalls(executor)
+        lines = [chart.create_line(name, color='red') for name in ('a', 'b', 'c')]
+        for line in lines:
+            calls.submit(line, line.set, pd.Series(np.arange(500.0), index=index, name=line.name))
+            calls.submit(line, line.markers_set, pd.Series(np.arange(500) % 100 == 0, index=index), type='entries')
+        calls.flush(chart.run_script)
+        # object names come from a process wide counter, number them per chart
+        names = {}
+        return [re.sub(r'_lwc\d+', lambda m: names.setdefault(m.group(), f'_lwc{len(names)}'), script)
+                for script in chart._scripts + chart.win.final_scripts]
+
+    def test_pool_emits_scripts_in_submission_order(self):
+        with ThreadPoolExecutor(4) as executor:
+            self.assertEqual(self.scripts(executor), self.scripts(None))
+
+    def chart_scripts(self, workers):
+        index = pd.date_range('2024-01-01', periods=500, freq='min')
+        close = pd.Series(np.arange(500.0), index=index, name='close')
+        # a multi-column indicator frame, set with `set_lines`
+        sweep = pd.DataFrame(np.arange(1500.0).reshape(500, 3), index=index,
+                             columns=pd.MultiIndex.from_product([['sma'], [5, 10, 20]], names=['ind', 'window']))
+        # line colors cycle process wide, start both charts on the same one
+        util.color_index = 0
+        with contextlib.redirect_stdout(io.StringIO()):
+            chartX = chart([Panel(right=[(close, 'close'), (sweep, 'sweep'), (close * 2, 'double')])],
+                           session=None, precision=2, workers=workers)
+        names = {}
+        return [re.sub(r'_lwc\d+', lambda m: names.setdefault(m.group(), f'_lwc{len(names)}'), script)
+                for script in chartX._scripts]
+
+    def test_chart_workers_emit_scripts_in_pane_order(self):
+        # series are created straight away, their data and options follow in pane order
+        def deferred(scripts):
+            return [script for script in scripts if 'createLineSeries' not in script]
+        self.assertEqual(deferred(self.chart_scripts(4)), deferred(self.chart_scripts(None)))
+
+    def test_chart_skips_frames_without_columns(self):
+        index = pd.date_range('2024-01-01', periods=10, freq='min')
+        close = pd.Series(np.arange(10.0), index=index, name='close')
+        empty = pd.DataFrame(index=index, columns=pd.MultiIndex.from_tuples([], names=['ind', 'window']))
+        with contextlib.redirect_stdout(io.StringIO()):
+            chartX = chart([Panel(right=[(close, 'close'), (empty, 'sweep', close > 5), (pd.DataFrame(index=index), 'none')])],
+                           session=None, precision=2)
+        self.assertEqual([line.name for line in chartX.lines()], ['close'])
+
+    def test_series_run_in_their_charts_group(self):
+        chart, other = StaticLWC(), StaticLWC()
+        line = chart.create_line('close', color='red')
+        df = pd.DataFrame({'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': np.arange(10.0), 'volume': 1.0},
+                          index=pd.date_range('2024-01-01', periods=10, freq='min'))
+        with ThreadPoolExecutor(4) as executor:
+            submitted = []
+            submit = executor.submit
+            executor.submit = lambda func, indices: submitted.append(indices) or submit(func, indices)
+            calls = OrderedCalls(executor)
+            # the chart's set also sets `line`, so the two can't run at the same time
+            calls.submit(chart, chart.set, df)
+            calls.submit(line, line.set, df['close'])
+            calls.submit(other, other.set, df)
+            calls.flush(chart.run_script)
+        self.assertEqual(sorted(submitted), [[0, 1], [2]])
+
+
+class TestLazyImport(unittest.TestCase):
+    def test_import_defers_submodules(self):
+        script = (
+            'import sys, lightweight_charts as lc\n'
+            'print(sorted(m for m in ("pandas", "webview", "matplotlib", "IPython") if m in sys.modules))\n'
+            'lc.Window\n'
+            'print(callable(lc.chart), "lightweight_charts.widgets" in sys.modules)'
+        )
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, env=env, check=True)
+        self.assertEqual(output.stdout.split('\n')[:2], ['[]', 'True False'])
+
+    def test_accessors_registered_on_lazy_import(self):
+        script = (
+            'from lightweight_charts import Chart\n'
+            'import pandas as pd\n'
+            'print(hasattr(pd.DataFrame(), "lw"), hasattr(pd.Series(dtype=float), "lw"))'
+        )
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, env=env, check=True)
+        self.assertEqual(output.stdout.strip(), 'True True')
+
+    def test_chart_is_the_helper_after_importing_the_submodule(self):
+        script = (
+            'import lightweight_charts.chart\n'
+            'from lightweight_charts.chart import Chart\n'
+            'from lightweight_charts import chart\n'
+            'import lightweight_charts as lc\n'
+            'from lightweight_charts.helpers import chart as helper\n'
+            'print(chart is helper, lc.chart is helper, callable(lc.chart), Chart.__module__)'
+        )
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, env=env, check=True)
+        self.assertEqual(output.stdout.strip(), 'True True True lightweight_charts.chart')
+
+    def test_color_parser(self):
+        self.assertEqual(color_to_rgb('RebeccaPurple'), (102, 51, 153))
+        self.assertEqual(color_to_rgb('#0f08'), (0, 255, 0))
+        self.assertEqual(apply_opacity('#112233', 0.5), 'rgba(17, 34, 51, 0.5)')
+        self.assertRaises(ValueError, color_to_rgb, 'nocolor')
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,409 @@
+import asyncio
+import json
+import unittest
+import numpy as np
+import pandas as pd
+
+from lightweight_charts.widgets import StaticLWC
+from lightweight_charts.util import (
+    BarStore, MarkerStore, OHLCPyramid, aggregate_ohlc, lttb_indices, minmax_indices, resample_ohlc
+)
+
+
+class TestBarStore(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({'time': [1., 2., 3.], 'value': [10., 20., 30.]})
+        self.store = BarStore(self.df)
+
+    def test_adopts_without_copy(self):
+        self.assertIs(self.store.frame(), self.df)
+
+    def test_append_grows(self):
+        for i in range(200):
+            self.store.append(pd.Series({'time': 4. + i, 'value': float(i)}))
+        frame = self.store.frame()
+        self.assertEqual(len(frame), 203)
+        self.assertEqual(frame['value'].dtype, np.float64)
+        self.assertEqual(frame['time'].iloc[-1], 203.)
+
+    def test_replace_last_does_not_mutate_source(self):
+        self.store.replace_last(pd.Series({'time': 3., 'value': 99.}))
+        self.assertEqual(self.store.frame()['value'].iloc[-1], 99.)
+        self.assertEqual(self.df['value'].iloc[-1], 30.)
+
+    def test_missing_and_new_columns(self):
+        self.store.append(pd.Series({'time': 4., 'color': 'red'}))
+        frame = self.store.frame()
+        self.assertTrue(np.isnan(frame['value'].iloc[-1]))
+        self.assertEqual(frame['color'].iloc[-1], 'red')
+        self.assertTrue(pd.isna(frame['color'].iloc[0]))
+
+    def test_prepend_and_extend(self):
+        for i in range(100):
+            self.store.prepend(pd.DataFrame({'time': [-2. * i, -2. * i + 1], 'value': [0., 0.]}))
+        self.store.extend(pd.DataFrame({'time': [4., 5.], 'value': [40., 50.], 'volume': [1., 2.]}))
+        frame = self.store.frame()
+        self.assertEqual(len(frame), 205)
+        self.assertEqual(frame['time'].iloc[0], -198.)
+        self.assertEqual(frame['value'].iloc[-5:].tolist(), [10., 20., 30., 40., 50.])
+        self.assertTrue(np.isnan(frame['volume'].iloc[0]))
+        self.assertEqual(self.df['time'].tolist(), [1., 2., 3.])
+
+
+class TestCopy(unittest.TestCase):
+    def setUp(self):
+        close = np.arange(10.0) + 100
+        self.df = pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                                'Volume': np.ones(10)}, index=pd.date_range('2024-01-01', periods=10, freq='min'))
+        self.before = self.df.copy()
+
+    def test_updates_leave_the_callers_frame_unchanged(self):
+        chart = StaticLWC()
+        line = chart.create_line('Close')
+        chart.set(self.df, copy=False)
+        line.set(self.df['Close'], copy=False)
+        last = self.df.index[-1]
+        chart.update(pd.Series({'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': 1.5, 'volume': 5.0}, name=last))
+        chart.update(pd.Series({'open': 3.0, 'high': 4.0, 'low': 2.5, 'close': 3.5, 'volume': 6.0},
+                               name=last + pd.Timedelta(minutes=1)))
+        line.update(pd.Series({'Close': 7.0}, name=last))
+        line.update(pd.Series({'Close': 8.0}, name=last + pd.Timedelta(minutes=1)))
+        self.assertEqual(chart.candle_data['close'].iloc[-2:].tolist(), [1.5, 3.5])
+        self.assertEqual(line.data['value'].iloc[-2:].tolist(), [7.0, 8.0])
+        pd.testing.assert_frame_equal(self.df, self.before)
+
+    def test_datetime_format_only_adds_time(self):
+        chart = StaticLWC()
+        result = chart._df_datetime_format(self.df)
+        self.assertEqual(list(result.columns), ['open', 'high', 'low', 'close', 'volume', 'time'])
+        self.assertTrue(all(np.shares_memory(result[col.lower()].to_numpy(), self.df[col].to_numpy())
+                            for col in self.df.columns))
+        pd.testing.assert_frame_equal(self.df, self.before)
+
+
+class TestUpdateFromTicks(unittest.TestCase):
+    def setUp(self):
+        close = 100 + np.arange(20.0)
+        self.df = pd.DataFrame({'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+                                'volume': np.full(20, 10.0)}, index=pd.date_range('2024-01-01', periods=20, freq='min'))
+        last = self.df.index[-1]
+        self.ticks = pd.DataFrame({
+            'time': [last + pd.Timedelta(seconds=s) for s in (5, 20, 40, 65, 70, 130, 175, 179)],
+            'price': [130.0, 90.0, 110.0, 111.0, 108.0, 120.0, 125.0, 119.0],
+            'volume': [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0],
+        })
+
+    def bars(self, ticks, cumulative_volume, batched):
+        chart = StaticLWC()
+        chart.set(self.df)
+        if batched:
+            chart.update_from_ticks(ticks, cumulative_volume=cumulative_volume)
+        else:
+            for _, tick in ticks.iterrows():
+                chart.update_from_tick(tick.copy(), cumulative_volume=cumulative_volume)
+        # the stored copy of the bar in progress is only brought up to date once the next bar starts
+        columns = ['time', 'open', 'high', 'low', 'close', 'volume']
+        stored = chart.candle_data[columns].astype(float).to_dict('records')
+        return stored[:-1], chart._last_bar[columns].astype(float).to_dict()
+
+    def assertMatchesUpdateFromTick(self, ticks, cumulative_volume):
+        self.assertEqual(self.bars(ticks, cumulative_volume, True), self.bars(ticks, cumulative_volume, False))
+
+    def test_ticks_in_one_bar(self):
+        for cumulative_volume in (True, False):
+            with self.subTest(cumulative_volume=cumulative_volume):
+                self.assertMatchesUpdateFromTick(self.ticks.iloc[:3], cumulative_volume)
+        stored, last = self.bars(self.ticks.iloc[:3], False, True)
+        self.assertEqual(len(stored), 19)
+        self.assertEqual((last['open'], last['high'], last['low'], last['close'], last['volume']),
+                         (119.0, 130.0, 90.0, 110.0, 3.0))
+
+    def test_ticks_crossing_bars(self):
+        for cumulative_volume in (True, False):
+            with self.subTest(cumulative_volume=cumulative_volume):
+                self.assertMatchesUpdateFromTick(self.ticks, cumulative_volume)
+        stored, last = self.bars(self.ticks, True, True)
+        self.assertEqual(len(stored), 21)
+        self.assertEqual((stored[-1]['open'], stored[-1]['close'], stored[-1]['volume']), (111.0, 108.0, 9.0))
+        self.assertEqual((last['open'], last['close'], last['volume']), (120.0, 119.0, 21.0))
+
+
+class TestMarkerStore(unittest.TestCase):
+    def test_add_merges_sorted(self):
+        store = MarkerStore()
+        first = store.add([3., 1.], 'aboveBar', 'arrowDown', 'red')
+        second = store.add(np.array([2., 3.]), 'belowBar', 'arrowUp', ['blue', 'green'])
+        self.assertEqual(store.time.tolist(), [1., 2., 3., 3.])
+        self.assertEqual(store.ids.tolist(), [first[1], second[0], first[0], second[1]])
+        self.assertEqual(store.to_dict()[int(second[1])]['color'], 'green')
+
+    def test_remove(self):
+        store = MarkerStore()
+        ids = store.add([1., 2., 3.], 'inBar', 'circle', 'red')
+        self.assertEqual(store.remove(ids[:2]), 2)
+        self.assertEqual(store.remove(ids[:2]), 0)
+        self.assertEqual(list(store.to_dict()), [ids[2]])
+
+    def test_js_only_sends_given_ids(self):
+        store = MarkerStore()
+        store.add([1., 2.], 'inBar', 'circle', ['red', 'blue'])
+        ids = store.add(3., 'inBar', 'circle', 'green', 'new')
+        script = store.js(ids)
+        self.assertIn('"id":[2]', script)
+        self.assertNotIn('red', script)
+        self.assertIn('"text":["new"]', script)
+
+
+class TestSetLines(unittest.TestCase):
+    def test_lines_share_the_time_axis(self):
+        chart = StaticLWC()
+        df = pd.DataFrame({'a': [1.0, np.nan, 3.0], 'b': [4.0, 5.0, 6.0]},
+                          index=pd.date_range('2024-01-01', periods=3, freq='min'))
+        lines = chart.set_lines(df, color='red')
+        self.assertEqual([line.name for line in lines], ['a', 'b'])
+        self.assertEqual(chart._scripts[-1].count('Lib.setLines'), 1)
+        self.assertEqual(lines[1].data['value'].tolist(), [4.0, 5.0, 6.0])
+        self.assertEqual(lines[0]._last_bar['value'], 3.0)
+        self.assertEqual(lines[0].data['time'].iloc[0], pd.Timestamp('2024-01-01').timestamp())
+
+    def test_time_column_is_the_axis(self):
+        chart = StaticLWC()
+        df = pd.DataFrame({'Date': pd.date_range('2024-01-01', periods=3, freq='min'), 'a': [1.0, 2.0, 3.0]})
+        lines = chart.set_lines(df, color='red')
+        self.assertEqual([line.name for line in lines], ['a'])
+        self.assertEqual(lines[0].data['time'].tolist(), [pd.Timestamp('2024-01-01').timestamp() + 60 * i for i in range(3)])
+        self.assertEqual(lines[0]._interval, 60)
+
+    def test_non_numeric_columns_are_rejected(self):
+        chart = StaticLWC()
+        df = pd.DataFrame({'a': [1.0, 2.0], 'label': ['x', 'y']}, index=pd.date_range('2024-01-01', periods=2))
+        self.assertRaises(TypeError, chart.set_lines, df)
+        self.assertEqual(chart.lines(), [])
+        lines = chart.set_lines(df[['a']].assign(flag=[True, False]), color='red')
+        self.assertEqual(lines[1].data['value'].tolist(), [1.0, 0.0])
+
+    def test_lines_created_beforehand(self):
+        chart = StaticLWC()
+        df = pd.DataFrame({'a': [1.0, 2.0], 'b': [3.0, 4.0]}, index=pd.date_range('2024-01-01', periods=2))
+        lines = [chart.create_line(name, color='red') for name in ('x', 'y')]
+        self.assertRaises(ValueError, chart.set_lines, df, lines=lines[:1])
+        self.assertEqual(chart.set_lines(df, lines=lines), lines)
+        self.assertEqual(len(chart.lines()), 2)
+        self.assertEqual(lines[1].data['value'].tolist(), [3.0, 4.0])
+
+
+class TestDownsample(unittest.TestCase):
+    def test_lttb_keeps_ends_and_spikes(self):
+        y = np.zeros(1000)
+        y[537] = 10.0
+        kept = lttb_indices(np.arange(1000.0), y, 50)
+        self.assertEqual(len(kept), 50)
+        self.assertEqual((kept[0], kept[-1]), (0, 999))
+        self.assertIn(537, kept)
+        self.assertTrue((np.diff(kept) > 0).all())
+
+    def test_minmax_keeps_envelope(self):
+        y = np.random.default_rng(0).standard_normal(10_000)
+        kept = minmax_indices(y, 100)
+        self.assertLessEqual(len(kept), 101)
+        self.assertIn(y.argmin(), kept)
+        self.assertIn(y.argmax(), kept)
+
+    def test_resample_ohlc(self):
+        df = pd.DataFrame({'time': np.arange(6.0), 'open': [1.0, 2, 3, 4, 5, 6], 'high': [2.0, 9, 4, 5, 6, 7],
+                           'low': [0.0, 1, -1, 3, 4, 5], 'close': [2.0, 3, 4, 5, 6, 7], 'volume': np.ones(6)})
+        bars = resample_ohlc(df, 2)
+        self.assertEqual(bars['time'].tolist(), [0.0, 5.0])
+        self.assertEqual(bars['open'].tolist(), [1.0, 6.0])
+        self.assertEqual(bars['high'].tolist(), [9.0, 7.0])
+        self.assertEqual(bars['low'].tolist(), [-1.0, 5.0])
+        self.assertEqual(bars['close'].tolist(), [6.0, 7.0])
+        self.assertEqual(bars['volume'].tolist(), [5.0, 1.0])
+
+    def test_downsampled_candles_take_live_updates(self):
+        chart = StaticLWC(width=200)
+        chart.downsample()
+        index = pd.date_range('2024-01-01', periods=1000, freq='min')
+        close = np.arange(1000.0)
+        chart.set(pd.DataFrame({'time': index, 'open': close, 'high': close + 1, 'low': close - 1,
+                                'close': close, 'volume': np.ones(1000)}))
+        script = next(s for s in chart._scripts if f'{chart.id}.series.setData(' in s)
+        sent = json.loads(script.split('zipColumns(', 1)[1].rsplit('))', 1)[0])['time']
+        self.assertEqual(len(sent), 200)
+        self.assertEqual(sent[-1], index[-1].timestamp())
+
+        chart.update(pd.Series({'open': 999.0, 'high': 1005.0, 'low': 998.0, 'close': 1004.0, 'volume': 2.0},
+                               name=index[-1]))
+        chart.update(pd.Series({'open': 1004.0, 'high': 1006.0, 'low': 1003.0, 'close': 1005.0, 'volume': 1.0},
+                               name=index[-1] + pd.Timedelta(minutes=1)))
+        self.assertEqual(len(chart.candle_data), 1001)
+        self.assertEqual(chart.candle_data['time'].iloc[-2], index[-1].timestamp())
+        self.assertEqual(chart.candle_data['close'].iloc[-2], 1004.0)
+        self.assertEqual(chart.candle_data['time'].iloc[-1], (index[-1] + pd.Timedelta(minutes=1)).timestamp())
+
+    def test_set_keeps_full_data_and_refines(self):
+        chart = StaticLWC(width=200)
+        chart.downsample()
+        index = pd.date_range('2024-01-01', periods=10_000, freq='min')
+        line = chart.create_line('a')
+        line.set(pd.Series(np.arange(10_000.0), index=index, name='a'))
+        self.assertEqual(len(line.data), 10_000)
+        self.assertEqual(chart._scripts[-1].count(','), 2 * 200 - 1)
+
+        line.refine(index[5000], index[5499])
+        self.assertGreater(chart._scripts[-1].count(','), 2 * 500)
+
+
+class TestOHLCPyramid(unittest.TestCase):
+    def setUp(self):
+        rows = 200_000
+        close = 100 + np.random.default_rng(0).standard_normal(rows).cumsum()
+        self.df = pd.DataFrame({'time': 1.7e9 + np.arange(rows, dtype=float), 'open': close, 'high': close + 1,
+                                'low': close - 1, 'close': close, 'volume': np.ones(rows)})
+        self.pyramid = OHLCPyramid(500)
+        self.top = self.pyramid.build(self.df, 1)
+
+    def zoom(self, start, end):
+        time = self.pyramid.time
+        first, last = np.searchsorted(time, start), np.searchsorted(time, end, 'right') - 1
+        return self.pyramid.zoom(first, len(time) - 1 - last)
+
+    def test_aggregate_ohlc_aligns_to_interval(self):
+        bars = aggregate_ohlc(self.df.iloc[5:130], 60)
+        self.assertEqual((bars['time'] % 60).tolist(), [0.0, 0.0, 0.0])
+        self.assertEqual(bars['volume'].sum(), 125)
+
+    def test_build_stops_at_points(self):
+        self.assertLessEqual(len(self.top), 500)
+        self.assertGreater(len(self.pyramid.levels[-2][1]), 500)
+
+    def test_zoom_swaps_in_finer_levels(self):
+        bars, start, end = self.zoom(1.7e9 + 90_000, 1.7e9 + 108_000)
+        self.assertEqual(self.pyramid.levels[self.pyramid.view[0]][0], 60)
+        self.assertTrue(bars['time'].is_monotonic_increasing and bars['time'].is_unique)
+        self.assertEqual(bars['volume'].sum(), len(self.df))
+
+        self.assertIsNone(self.zoom(start + 600, end - 600))
+        bars, start, end = self.zoom(1.7e9 + 100_020, 1.7e9 + 100_320)
+        self.assertEqual(self.pyramid.view[0], 0)
+        self.assertEqual(((bars['time'] >= start) & (bars['time'] <= end)).sum(), end - start + 1)
+        self.assertEqual(bars['volume'].sum(), len(self.df))
+
+        bars, _, _ = self.zoom(1.7e9, 1.7e9 + len(self.df))
+        self.assertEqual(len(bars), len(self.top))
+
+    def test_range_change_handlers(self):
+        chart = StaticLWC(width=500)
+        chart.pyramid()
+        chart.set(self.df.assign(time=pd.to_datetime(self.df['time'], unit='s')))
+        calls = []
+        chart.events.range_change += lambda c, before, after: calls.append((before, after))
+        handler = chart.win.handlers[chart.events.range_change._name]
+        handler('100', '100')
+        self.assertEqual(calls, [(100.0, 100.0)])
+        self.assertIn('setVisibleRange', chart._scripts[-1])
+        self.assertEqual(sum(script.count('checkLogicalRange') > 0 for script in chart._scripts), 1)
+
+    def live_chart(self):
+        chart = StaticLWC(width=500)
+        chart.pyramid()
+        chart.set(self.df.assign(time=pd.to_datetime(self.df['time'], unit='s')))
+        return chart
+
+    def tick(self, chart, seconds, price):
+        time = pd.Timestamp(chart._last_bar['time'], unit='s') + pd.Timedelta(seconds=seconds)
+        chart.update_from_tick(pd.Series({'time': time, 'price': price, 'volume': 1.0}), cumulative_volume=True)
+
+    def assertLevelsMatchRebuild(self, chart):
+        rebuilt = OHLCPyramid(chart._pyramid.points, chart._pyramid.intervals)
+        rebuilt.build(chart.candle_data.copy(), chart._interval)
+        self.assertEqual(len(chart._pyramid.levels), len(rebuilt.levels))
+        for (_, store), (_, expected) in zip(chart._pyramid.levels, rebuilt.levels):
+            pd.testing.assert_frame_equal(store.frame().reset_index(drop=True), expected.frame().reset_index(drop=True),
+                                          check_dtype=False)
+
+    def test_updates_reach_every_level(self):
+        chart = self.live_chart()
+        for seconds, price in ((0, 500.0), (1, 20.0), (60, 99.0), (3600, 101.0)):
+            self.tick(chart, seconds, price)
+        self.assertLevelsMatchRebuild(chart)
+
+        pyramid = chart._pyramid
+        top = pyramid.levels[-1][1].frame()
+        self.assertEqual(pyramid.time.tolist(), top['time'].tolist())
+        self.assertIn(f'{chart.id}.series.update', chart._scripts[-1])
+        self.assertIn(f'"time":[{top["time"].iat[-1]}]', chart._scripts[-1])
+        self.assertEqual(top['high'].max(), 500.0)
+
+        last = pd.Timestamp(chart._last_bar['time'], unit='s')
+        chart.update_from_ticks({'time': [last, last + pd.Timedelta(hours=5)], 'price': [1.0, 2.0], 'volume': [1.0, 1.0]})
+        self.assertLevelsMatchRebuild(chart)
+        self.assertEqual(chart._pyramid.levels[-1][1].frame()['close'].iat[-1], 2.0)
+
+    def test_updates_follow_the_levels_shown(self):
+        chart = self.live_chart()
+        end = 1.7e9 + len(self.df) - 1
+        while chart._pyramid.view[0] != 0:
+            chart._zoom_pyramid(chart, len(chart._pyramid.time) - 40, 0)
+
+        self.tick(chart, 1, 150.0)
+        self.assertEqual(chart._pyramid.time[-1], end + 1)
+        self.assertIn(f'"time":[{end + 1}]', chart._scripts[-1])
+        # a live bar beyond the finest ring is sent at the coarser level which covers it
+        self.tick(chart, 7200, 151.0)
+        self.assertEqual(chart._pyramid.time[-1] % chart._pyramid.levels[-1][0], 0)
+        self.assertTrue(np.all(np.diff(chart._pyramid.time) > 0))
+        self.assertLevelsMatchRebuild(chart)
+
+        chart._zoom_pyramid(chart, 0, 0)
+        top = chart._pyramid.levels[-1][1].frame()
+        self.assertEqual(chart._pyramid.view[0], len(chart._pyramid.levels) - 1)
+        self.assertEqual(top['close'].iat[-1], 151.0)
+        self.assertEqual(top['volume'].sum(), len(self.df) + 2)
+
+
+class TestDataProvider(unittest.TestCase):
+    def setUp(self):
+        close = 100 + np.random.default_rng(0).standard_normal(1000).cumsum()
+        self.df = pd.DataFrame({'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+                                'volume': np.ones(1000)}, index=pd.date_range('2024-01-01', periods=1000, freq='min'))
+        self.chart = StaticLWC()
+        self.chart.set(self.df.iloc[400:500])
+
+    def range_change(self, bars_before, bars_after):
+        # as called for a message from the JS side
+        return self.chart.win.handlers[self.chart.events.range_change._name](bars_before, bars_after)
+
+    def test_pages_in_both_directions(self):
+        provider = self.chart.data_provider(
+            older=lambda time: self.df[self.df.index < time].iloc[-150:],
+            newer=lambda time: self.df[self.df.index > time].iloc[:150],
+        )
+        for _ in range(5):
+            self.range_change('10', '10')
+        self.assertEqual(provider.exhausted, {'older', 'newer'})
+        self.assertEqual(self.chart.candle_data['close'].tolist(), self.df['close'].tolist())
+        self.assertEqual(sum('series.setData' in script for script in self.chart._scripts), 1)
+        self.assertTrue(any(script.startswith('Lib.prependData') for script in self.chart._scripts))
+
+    def test_async_generator_source(self):
+        async def older(time):
+            while time > self.df.index[0]:
+                chunk = self.df[self.df.index < time].iloc[-300:]
+                time = chunk.index[0]
+                yield chunk
+
+        provider = self.chart.data_provider(older=older, threshold=20)
+
+        async def scroll():
+            for _ in range(3):
+                await self.range_change('5', '500')
+        asyncio.run(scroll())
+        self.assertEqual(len(self.chart.candle_data), 500)
+        self.assertIn('older', provider.exhausted)
+        self.chart.data_provider()
+        self.assertEqual(self.chart.events.range_change._handlers, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
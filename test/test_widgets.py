@@ -0,0 +1,25 @@
+import unittest
+
+from lightweight_charts.widgets import StaticLWC, shared_assets_script
+
+
+class TestStaticLWC(unittest.TestCase):
+    def test_assets_are_cached_and_scripts_appended(self):
+        first, second = StaticLWC(), StaticLWC()
+        self.assertIs(first._prefix, second._prefix)
+        first.run_script('a()')
+        first.run_script('c()', run_last=True)
+        first.run_script('b()')
+        first.load()
+        self.assertEqual(first._html, first._prefix + ''.join('\n' + s for s in first._scripts))
+        self.assertEqual(first._scripts[-3:], ['a()', 'b()', 'c()'])
+
+    def test_shared_assets_are_left_out(self):
+        shared, inlined = StaticLWC(shared_assets=True), StaticLWC()
+        self.assertLess(len(shared._prefix) * 10, len(inlined._prefix))
+        self.assertIn('_lwcInject("bundle")', shared._prefix)
+        self.assertNotIn('</script', shared_assets_script()[8:-9])
+
+
+if __name__ == '__main__':
+    unittest.main()
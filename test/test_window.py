@@ -0,0 +1,201 @@
+import asyncio
+import concurrent.futures
+import queue
+import threading
+import time
+import unittest
+import numpy as np
+import pandas as pd
+
+from lightweight_charts.abstract import AbstractChart, Window
+from lightweight_charts.util import IDGen, ResultRouter, ScriptBatcher, UpdateCoalescer
+
+
+class TestUpdateCoalescer(unittest.TestCase):
+    def test_keeps_latest_per_key_in_order(self):
+        coalescer = UpdateCoalescer(60, lambda: None)
+        coalescer.add(('a', 1), 'a1')
+        coalescer.add(('b', 1), 'b1')
+        coalescer.add(('a', 1), 'a1 again')
+        coalescer.add(('a', 2), 'a2')
+        self.assertEqual(coalescer.take(), ['a1 again', 'b1', 'a2'])
+        self.assertEqual(coalescer.take(), [])
+
+    def test_flushes_after_interval(self):
+        flushed = threading.Event()
+        coalescer = UpdateCoalescer(0.01, flushed.set)
+        coalescer.add(('a', 1), 'a1')
+        self.assertTrue(flushed.wait(1))
+
+    def test_timer_leaves_bulk_run_to_the_main_thread(self):
+        scripts = []
+        window = Window(scripts.append)
+        window.loaded = True
+        window.coalesce_updates(100)
+        with window.bulk_run:
+            window.run_script('create()')
+            window._run_update(('a', 1), 'update1()')
+            time.sleep(0.05)
+            self.assertEqual(scripts, [])
+        self.assertEqual(scripts, ['create()'])
+        time.sleep(0.05)
+        self.assertEqual(scripts, ['create()', 'update1()'])
+
+        window._run_update(('a', 1), 'update2()')
+        window._run_update(('b', 1), 'update3()')
+        time.sleep(0.05)
+        self.assertEqual(scripts[-1], 'update2()\nupdate3()')
+
+
+class TestIDGen(unittest.TestCase):
+    def test_unique_and_recycled(self):
+        gen = IDGen()
+        ids = [gen.generate() for _ in range(1000)]
+        self.assertEqual(len(set(ids)), 1000)
+        self.assertTrue(all(var.startswith('window.') for var in ids))
+        gen.release(ids[10])
+        gen.release(ids[10])
+        self.assertNotIn(ids[10], gen)
+        self.assertEqual(gen.generate(), ids[10])
+        self.assertEqual(gen.generate(), f'{IDGen.prefix}1000')
+
+
+class TestScriptBatcher(unittest.TestCase):
+    def test_flushes_once_per_loop_iteration(self):
+        sent = []
+        batcher = ScriptBatcher(sent.append)
+
+        async def main():
+            for i in range(3):
+                batcher.add(f'script{i}')
+            self.assertEqual(sent, [])
+            await asyncio.sleep(0)
+
+        asyncio.run(main())
+        self.assertEqual(sent, ['script0\nscript1\nscript2'])
+
+    def test_flushes_after_delay_or_size(self):
+        sent = []
+        batcher = ScriptBatcher(sent.append, delay=0.01, max_bytes=10)
+        batcher.add('a')
+        batcher.add('b')
+        time.sleep(0.1)
+        self.assertEqual(sent, ['a\nb'])
+        batcher.add('x' * 10)
+        self.assertEqual(sent[-1], 'x' * 10)
+
+
+class TestResultRouter(unittest.TestCase):
+    def test_results_reach_their_request(self):
+        results = queue.Queue()
+        router = ResultRouter(results)
+        first_id, first = router.request()
+        second_id, second = router.request()
+        results.put((second_id, 'second', None))
+        results.put((first_id, None, ValueError('first')))
+        self.assertEqual(second.result(1), 'second')
+        self.assertRaises(ValueError, first.result, 1)
+
+    def test_discarded_results_are_dropped(self):
+        results = queue.Queue()
+        router = ResultRouter(results)
+        request_id, future = router.request()
+        router.discard(request_id)
+        results.put((request_id, 'late', None))
+        next_id, next_future = router.request()
+        results.put((next_id, 'next', None))
+        self.assertEqual(next_future.result(1), 'next')
+        self.assertFalse(future.done())
+
+    def test_cancelled_evaluate_keeps_the_router_running(self):
+        window = Window(lambda script: None)
+        window.loaded = True
+        window._return_q = queue.Queue()
+
+        async def main():
+            task = asyncio.create_task(window.evaluate('1'))
+            await asyncio.sleep(0)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            # the late reply of the cancelled request, and one for a request without an id left to wake
+            window._return_q.put((0, 'late', None))
+            router, request_id, future = window._request('2')
+            self.assertNotIn(0, router._futures)
+            router._futures[0] = cancelled = concurrent.futures.Future()
+            cancelled.cancel()
+            window._return_q.put((0, 'late', None))
+            window._return_q.put((request_id, 'next', None))
+            return await asyncio.wait_for(asyncio.wrap_future(future), 1)
+
+        try:
+            self.assertEqual(asyncio.run(main()), 'next')
+            self.assertTrue(Window._results._thread.is_alive())
+        finally:
+            Window._results.close()
+            Window._results = None
+
+    def test_router_is_closed_with_its_queue(self):
+        window = Window(lambda script: None)
+        window.loaded = True
+        window._return_q = queue.Queue()
+        try:
+            old, _, pending = window._request('1')
+            thread = old._thread
+            window._return_q = queue.Queue()
+            router, _, _ = window._request('2')
+            self.assertIsNot(router, old)
+            self.assertFalse(thread.is_alive())
+            self.assertRaises(RuntimeError, pending.result, 1)
+        finally:
+            Window._results.close()
+            Window._results = None
+
+
+class TestDispatch(unittest.TestCase):
+    def test_commands_are_serialized(self):
+        scripts = []
+        window = Window(scripts.append)
+        window.loaded = True
+        window.dispatch(('apply', 'window.a.series', {'visible': False}), ('call', 'window.a', 'reSize', 1, 2))
+        self.assertEqual(scripts, [
+            'Lib.dispatch([["apply","window.a.series",[{"visible":false}]],["call","window.a",["reSize",1,2]]])'
+        ])
+
+    def test_numpy_option_values(self):
+        scripts = []
+        window = Window(scripts.append)
+        window.loaded = True
+        chart = AbstractChart(window)
+        chart.precision(np.int64(3))
+        chart.crosshair(vert_width=np.int64(2), horz_visible=np.bool_(False))
+        self.assertIn('"precision":3', scripts[-2])
+        self.assertIn('"width":2', scripts[-1])
+        self.assertIn('"visible":false', scripts[-1])
+
+
+class TestProfiler(unittest.TestCase):
+    def test_records_stages_per_method(self):
+        window = Window(lambda script: None)
+        window.loaded = True
+        chart = AbstractChart(window)
+        df = pd.DataFrame({'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': 1.5},
+                          index=pd.date_range('2024-01-01', periods=10, freq='min'))
+        chart.downsample(points=5)
+        with window.profile() as profiler:
+            chart.set(df)
+            chart.update(df.iloc[-1].rename(df.index[-1] + pd.Timedelta(minutes=1)))
+        self.assertIsNone(window.profiler)
+        stats = profiler.stats()
+        self.assertEqual(stats['set']['total']['count'], 1)
+        self.assertGreater(stats['set']['serialize']['bytes'], 0)
+        self.assertIn('format', stats['update'])
+        self.assertEqual(stats['set']['downsample']['count'], 1)
+        self.assertIn('downsample', profiler.report())
+        self.assertEqual(sum(stats['update']['total']['histogram'].values()), 1)
+        chart.set(df)
+        self.assertEqual(profiler.stats()['set']['total']['count'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()